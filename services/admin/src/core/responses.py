@@ -0,0 +1,18 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse на orjson: FastAPI передаёт сюда уже JSON-совместимые данные после сериализации по схеме,
+    остаётся только быстро закодировать их в байты.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def default_response_class(fast_json_responses: bool) -> type[JSONResponse]:
+    return FastJSONResponse if fast_json_responses else JSONResponse
@@ -25,6 +25,9 @@ class Settings(BaseSettings):
     default_interest: int = 5
     default_importance: int = 5
 
+    # Кодирование ответов через orjson вместо стандартного json
+    FAST_JSON_RESPONSES: bool = True
+
     @property
     def db_url(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
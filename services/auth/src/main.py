@@ -1,13 +1,16 @@
 from fastapi import FastAPI, Depends
 
 from src.api import api_router
+from src.core.config import settings
 from src.core.middleware import middleware
+from src.core.responses import default_response_class
 from src.core.security import oauth2_scheme
 
 app = FastAPI(
     root_path="/api/auth",
     title="Auth Service",
     middleware=middleware,
+    default_response_class=default_response_class(settings.FAST_JSON_RESPONSES),
     swagger_ui_parameters={"persistAuthorization": True},
     dependencies=[Depends(oauth2_scheme)]
 )
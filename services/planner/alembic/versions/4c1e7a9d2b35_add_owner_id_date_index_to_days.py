@@ -0,0 +1,27 @@
+"""Add (owner_id, date) index to days for keyset pagination
+
+Revision ID: 4c1e7a9d2b35
+Revises: da692a350960
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e7a9d2b35'
+down_revision: Union[str, None] = 'da692a350960'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_days_owner_id_date', 'days', ['owner_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_days_owner_id_date', table_name='days')
@@ -0,0 +1,51 @@
+"""
+Сравнение времени аллокации: points_allocation из task_planner против векторизованного движка на NumPy.
+
+Запуск из services/planner (БД не нужна):
+    python -m benchmarks.allocation_engines
+"""
+import datetime as dt
+import random
+import time
+
+from src.core.allocation import AllocationMethod, run_allocation
+from src.core.config import settings
+from src.schemas.task import TaskSchema
+
+TASKS_COUNTS = (100, 10_000, 100_000)
+START_DATE = dt.date(2026, 1, 1)
+
+
+def build_tasks(tasks_count: int) -> list[TaskSchema]:
+    rng = random.Random(tasks_count)
+    return [
+        TaskSchema(
+            id=task_id,
+            name=f"task_{task_id}",
+            interest=rng.randint(1, 10),
+            importance=rng.randint(1, 10),
+            work_hours=rng.randint(1, 8),
+            deadline=START_DATE + dt.timedelta(days=rng.randint(0, tasks_count)) if rng.random() < 0.5 else None
+        )
+        for task_id in range(1, tasks_count + 1)
+    ]
+
+
+def measure(allocation_method: AllocationMethod, tasks: list[TaskSchema]) -> float:
+    time_start = time.perf_counter()
+    run_allocation(allocation_method, tasks, [], START_DATE, settings.default_day_work_hours,
+                   settings.default_task_work_hours)
+    return time.perf_counter() - time_start
+
+
+def main():
+    print(f"{'tasks':>8} {'points_allocation, s':>22} {'vectorized_points, s':>22} {'speedup':>9}")
+    for tasks_count in TASKS_COUNTS:
+        tasks = build_tasks(tasks_count)
+        points_time = measure(AllocationMethod.points_allocation, tasks)
+        vectorized_time = measure(AllocationMethod.vectorized_points, tasks)
+        print(f"{tasks_count:>8} {points_time:>22.3f} {vectorized_time:>22.3f} {points_time / vectorized_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
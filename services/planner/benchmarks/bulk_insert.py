@@ -0,0 +1,86 @@
+"""
+Сравнение скорости записи результата аллокации: ORM unit of work против bulk Core-вставки.
+
+Запуск из services/planner против тестовой БД с применёнными миграциями:
+    python -m benchmarks.bulk_insert
+Все изменения откатываются после каждого прогона.
+"""
+import asyncio
+import datetime as dt
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.config import settings
+from src.crud import day_crud
+from src.models import User, Task, Day, TaskExecution
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+EXECUTIONS_COUNTS = (1_000, 10_000, 100_000)
+EXECUTIONS_PER_DAY = 10
+START_DATE = dt.date(2000, 1, 1)
+
+engine = create_async_engine(settings.db_url, poolclass=NullPool)
+
+
+def build_planned_days(task_ids: list[int], executions_count: int) -> list[CreateTaskExecutionsDaySchema]:
+    return [
+        CreateTaskExecutionsDaySchema(
+            date=START_DATE + dt.timedelta(days=day_number),
+            work_hours=settings.default_day_work_hours,
+            task_executions=[CreateTaskExecutionSchema(task_id=task_id, doing_hours=1) for task_id in task_ids]
+        )
+        for day_number in range(executions_count // EXECUTIONS_PER_DAY)
+    ]
+
+
+async def orm_insert(session: AsyncSession, owner_id: int, planned_days: list[CreateTaskExecutionsDaySchema]):
+    # Прежний путь allocate_tasks: ORM-объекты и session.add_all
+    session.add_all(
+        Day(
+            **day_schema.model_dump(exclude={"task_executions"}),
+            owner_id=owner_id,
+            task_executions=[
+                TaskExecution(**task_execution_schema.model_dump(), owner_id=owner_id) for task_execution_schema in
+                day_schema.task_executions]
+        )
+        for day_schema in planned_days)
+    await session.flush()
+
+
+async def bulk_insert(session: AsyncSession, owner_id: int, planned_days: list[CreateTaskExecutionsDaySchema]):
+    await day_crud.owner_sync_calendar(session, owner_id, planned_days)
+
+
+async def measure(insert_func, executions_count: int) -> float:
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+            user = User(name="bulk_insert_benchmark", hashed_password="-")
+            session.add(user)
+            await session.flush()
+            tasks = [Task(name=f"task_{number}", owner_id=user.id) for number in range(EXECUTIONS_PER_DAY)]
+            session.add_all(tasks)
+            await session.flush()
+            planned_days = build_planned_days([task.id for task in tasks], executions_count)
+
+            time_start = time.perf_counter()
+            await insert_func(session, user.id, planned_days)
+            duration = time.perf_counter() - time_start
+        await transaction.rollback()
+    return executions_count / duration
+
+
+async def main():
+    print(f"{'executions':>12} {'orm rows/s':>14} {'bulk rows/s':>14} {'speedup':>9}")
+    for executions_count in EXECUTIONS_COUNTS:
+        orm_rate = await measure(orm_insert, executions_count)
+        bulk_rate = await measure(bulk_insert, executions_count)
+        print(f"{executions_count:>12} {orm_rate:>14.0f} {bulk_rate:>14.0f} {bulk_rate / orm_rate:>8.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Сравнение путей чтения /calendar_with_tasks: ORM + selectinload + TypeAdapter против одного запроса
+с json_build_object, отдающего готовый JSON каждого дня (как при CALENDAR_SQL_JSON), склеенный в тело ответа.
+
+Запуск из services/planner против тестовой БД с применёнными миграциями:
+    python -m benchmarks.calendar_with_tasks
+Все изменения откатываются после каждого прогона.
+"""
+import asyncio
+import datetime as dt
+import statistics
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.calendar_cache import join_day_bodies
+from src.core.config import settings
+from src.core.responses import JSON_MEDIA_TYPE
+from src.crud import day_crud
+from src.models import User, Task
+from src.schemas.day import CreateTaskExecutionsDaySchema, TasksDaySchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+DAYS_COUNTS = (30, 365, 2000)
+TASKS_COUNT = 50
+EXECUTIONS_PER_DAY = 4
+REPEATS = 5
+START_DATE = dt.date(2000, 1, 1)
+
+engine = create_async_engine(settings.db_url, poolclass=NullPool)
+tasks_days_adapter = TypeAdapter(list[TasksDaySchema])
+
+
+async def orm_read(session: AsyncSession, owner_id: int) -> bytes:
+    # Прежний путь: три запроса, ORM-объекты и повторная валидация Pydantic
+    days = await day_crud.owner_calendar_window(session, owner_id, START_DATE, with_tasks=True)
+    return tasks_days_adapter.dump_json(tasks_days_adapter.validate_python(days))
+
+
+async def sql_json_read(session: AsyncSession, owner_id: int) -> bytes:
+    bodies = await day_crud.owner_calendar_with_tasks_day_json(session, owner_id, START_DATE)
+    return join_day_bodies(list(bodies.values()), JSON_MEDIA_TYPE)
+
+
+async def seed(session: AsyncSession, days_count: int) -> int:
+    user = User(name="calendar_benchmark", hashed_password="-")
+    session.add(user)
+    await session.flush()
+    tasks = [Task(name=f"task_{number}", owner_id=user.id) for number in range(TASKS_COUNT)]
+    session.add_all(tasks)
+    await session.flush()
+    planned_days = [
+        CreateTaskExecutionsDaySchema(
+            date=START_DATE + dt.timedelta(days=day_number),
+            work_hours=settings.default_day_work_hours,
+            task_executions=[
+                CreateTaskExecutionSchema(task_id=tasks[(day_number + number) % TASKS_COUNT].id, doing_hours=1)
+                for number in range(EXECUTIONS_PER_DAY)]
+        )
+        for day_number in range(days_count)
+    ]
+    await day_crud.owner_sync_calendar(session, user.id, planned_days)
+    await session.flush()
+    return user.id
+
+
+async def measure(read_func, session: AsyncSession, owner_id: int) -> tuple[float, float, int]:
+    """
+    Медианная задержка (мс), пик памяти Python на запрос (КиБ) и размер ответа (байты).
+    """
+    durations = []
+    for _ in range(REPEATS):
+        session.expunge_all()
+        time_start = time.perf_counter()
+        await read_func(session, owner_id)
+        durations.append(time.perf_counter() - time_start)
+
+    session.expunge_all()
+    tracemalloc.start()
+    body = await read_func(session, owner_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(durations) * 1000, peak / 1024, len(body)
+
+
+async def main():
+    print(f"{'days':>6} {'orm ms':>9} {'orm KiB':>10} {'sql ms':>9} {'sql KiB':>10} {'body KiB':>10} {'speedup':>9}")
+    for days_count in DAYS_COUNTS:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+                owner_id = await seed(session, days_count)
+                orm_ms, orm_kib, body_size = await measure(orm_read, session, owner_id)
+                sql_ms, sql_kib, _ = await measure(sql_json_read, session, owner_id)
+            await transaction.rollback()
+        print(f"{days_count:>6} {orm_ms:>9.1f} {orm_kib:>10.0f} {sql_ms:>9.1f} {sql_kib:>10.0f} "
+              f"{body_size / 1024:>10.0f} {orm_ms / sql_ms:>8.1f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Пропускная способность (запросов/с) /tasks и /calendar при попадании в кэш на запущенном сервисе.
+Сравнение путей ответа: запустить сервис с FAST_JSON_RESPONSES=true и =false и прогнать скрипт дважды.
+/calendar ограничен RateLimiter (100 запросов в минуту на пользователя), поэтому сервис для замера запускается
+с RATE_LIMIT_ENABLED=false. Ответы 429 не прерывают замер, а считаются отдельно и не входят в req/s:
+ненулевое их число значит, что ограничение не отключено и результат для этого пути неверен.
+
+Запуск из services/planner:
+    python -m benchmarks.responses --base-url http://localhost/api/planner --token <access token>
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import status
+
+PATHS = ("/tasks", "/calendar")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure requests/sec of planner read endpoints")
+    parser.add_argument("--base-url", default="http://localhost/api/planner")
+    parser.add_argument("--token", required=True, help="Access token of a user with tasks and an allocated calendar")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per endpoint")
+    return parser.parse_args()
+
+
+async def measure(client: httpx.AsyncClient, path: str, concurrency: int, duration: float) -> tuple[float, int]:
+    """
+    Возвращает число успешных запросов в секунду и число ответов 429.
+    """
+    # Первый запрос прогревает кэш, дальше измеряются только попадания
+    (await client.get(path)).raise_for_status()
+    deadline = time.perf_counter() + duration
+    done = 0
+    rate_limited = 0
+
+    async def worker():
+        nonlocal done, rate_limited
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                rate_limited += 1
+                continue
+            response.raise_for_status()
+            done += 1
+
+    time_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done / (time.perf_counter() - time_start), rate_limited
+
+
+async def main():
+    args = parse_args()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits) as client:
+        for path in PATHS:
+            requests_per_second, rate_limited = await measure(client, path, args.concurrency, args.duration)
+            print(f"{path:<12} {requests_per_second:>10.0f} req/s {rate_limited:>8} x 429")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Сравнение сериализации календаря: TypeAdapter.dump_json/validate_json против MessagePack
+(dump_python(mode="json") + msgpack). Показывает время кодирования, декодирования и размер,
+а также сжатие JSON-тела zlib и zstd (если установлен zstandard) на уровне settings.CACHE_COMPRESSION_LEVEL.
+
+Запуск из services/planner (БД не нужна):
+    python -m benchmarks.serialization
+"""
+import datetime as dt
+import time
+import zlib
+
+import msgpack
+from pydantic import TypeAdapter
+
+from src.core.config import settings
+from src.schemas.day import TasksDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import TaskAndExecutionSchema
+
+DAYS_COUNTS = (30, 365, 2000)
+TASKS_COUNT = 50
+EXECUTIONS_PER_DAY = 4
+REPEATS = 20
+START_DATE = dt.date(2026, 1, 1)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+adapter = TypeAdapter(list[TasksDaySchema])
+
+
+def build_calendar(days_count: int) -> list[TasksDaySchema]:
+    tasks = [TaskSchema(id=task_id, name=f"task_{task_id}", deadline=START_DATE + dt.timedelta(days=task_id),
+                        interest=5, importance=5, work_hours=8) for task_id in range(1, TASKS_COUNT + 1)]
+    return [
+        TasksDaySchema(id=day_number + 1, date=START_DATE + dt.timedelta(days=day_number), work_hours=4,
+                       task_executions=[TaskAndExecutionSchema(doing_hours=1,
+                                                               task=tasks[(day_number + number) % TASKS_COUNT])
+                                        for number in range(EXECUTIONS_PER_DAY)])
+        for day_number in range(days_count)
+    ]
+
+
+def msgpack_encode_calendar(calendar: list[TasksDaySchema]) -> bytes:
+    return msgpack.packb(adapter.dump_python(calendar, mode="json"))
+
+
+def msgpack_decode_calendar(data: bytes) -> list[TasksDaySchema]:
+    return adapter.validate_python(msgpack.unpackb(data))
+
+
+def measure_ms(func, *args) -> float:
+    time_start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return (time.perf_counter() - time_start) / REPEATS * 1000
+
+
+def main():
+    print(f"{'days':>6} {'json enc ms':>12} {'json dec ms':>12} {'json KiB':>9} "
+          f"{'msgpack enc ms':>15} {'msgpack dec ms':>15} {'msgpack KiB':>12}")
+    for days_count in DAYS_COUNTS:
+        calendar = build_calendar(days_count)
+        json_data = adapter.dump_json(calendar)
+        msgpack_data = msgpack_encode_calendar(calendar)
+
+        json_encode = measure_ms(adapter.dump_json, calendar)
+        json_decode = measure_ms(adapter.validate_json, json_data)
+        msgpack_encode = measure_ms(msgpack_encode_calendar, calendar)
+        msgpack_decode = measure_ms(msgpack_decode_calendar, msgpack_data)
+        print(f"{days_count:>6} {json_encode:>12.2f} {json_decode:>12.2f} {len(json_data) / 1024:>9.0f} "
+              f"{msgpack_encode:>15.2f} {msgpack_decode:>15.2f} {len(msgpack_data) / 1024:>12.0f}")
+
+    level = settings.CACHE_COMPRESSION_LEVEL
+    compressors = {"zlib": (lambda data: zlib.compress(data, level), zlib.decompress)}
+    if zstandard is not None:
+        compressors["zstd"] = (zstandard.ZstdCompressor(level=level).compress,
+                               zstandard.ZstdDecompressor().decompress)
+    print(f"\n{'days':>6} {'codec':>6} {'comp ms':>9} {'decomp ms':>10} {'KiB':>6} {'ratio':>6}")
+    for days_count in DAYS_COUNTS:
+        json_data = adapter.dump_json(build_calendar(days_count))
+        for name, (compress, decompress) in compressors.items():
+            compressed = compress(json_data)
+            print(f"{days_count:>6} {name:>6} {measure_ms(compress, json_data):>9.2f} "
+                  f"{measure_ms(decompress, compressed):>10.2f} {len(compressed) / 1024:>6.0f} "
+                  f"{len(compressed) / len(json_data):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Перепланирование расписаний всех пользователей (например, ночью или после смены default_day_work_hours).
+
+    python reallocate.py --method points_allocation --db-concurrency 8
+
+Пользователи читаются из таблицы users пачками по id, CPU-bound аллокация распределяется по процессам пула
+allocation_executor (по процессу на ядро), а запись в БД идёт с ограниченным числом одновременных сессий.
+"""
+import argparse
+import asyncio
+import datetime as dt
+import logging
+import logging.config
+import os
+import sys
+import time
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from src.core.allocation import AllocationMethod
+from src.core.config import settings
+from src.core.database import session_factory
+from src.core.executor import allocation_executor
+from src.core.log import log_config
+from src.core.redis import redis_service
+from src.crud.allocation import owner_allocate
+from src.models import User
+
+logger = logging.getLogger("planner.reallocate")
+
+PROGRESS_INTERVAL_SECONDS = 5
+USER_IDS_BATCH_SIZE = 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-allocate tasks for all active users")
+    parser.add_argument("--method", type=AllocationMethod, default=AllocationMethod.points_allocation,
+                        choices=list(AllocationMethod), metavar="|".join(method.value for method in AllocationMethod))
+    parser.add_argument("--start-date", type=dt.date.fromisoformat, default=dt.date.today())
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processes in the allocation pool (default: CPU count)")
+    parser.add_argument("--db-concurrency", type=int, default=8,
+                        help="Users allocated and written to the database at the same time")
+    args = parser.parse_args()
+    # Каждому одновременно обрабатываемому пользователю нужно своё соединение и ещё одно - чтению id
+    pool_capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    if args.db_concurrency + 1 > pool_capacity:
+        parser.error(f"--db-concurrency must be less than the database pool size ({pool_capacity}), "
+                     f"see DB_POOL_SIZE and DB_MAX_OVERFLOW")
+    return args
+
+
+class Progress:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.reported_at = self.started_at
+        self.done = 0
+        self.failed_user_ids: list[int] = []
+
+    @property
+    def users_per_second(self) -> float:
+        return (self.done + len(self.failed_user_ids)) / max(time.perf_counter() - self.started_at, 1e-9)
+
+    def report(self, force: bool = False):
+        now = time.perf_counter()
+        if force or now - self.reported_at >= PROGRESS_INTERVAL_SECONDS:
+            self.reported_at = now
+            logger.info(f"Re-allocated {self.done} users, failed {len(self.failed_user_ids)}, "
+                        f"{self.users_per_second:.1f} users/sec")
+
+
+async def active_user_ids(batch_size: int = USER_IDS_BATCH_SIZE) -> AsyncIterator[int]:
+    """
+    Id активных пользователей по возрастанию. Каждая пачка читается keyset-запросом (id > последнего)
+    в отдельной короткой транзакции, поэтому за весь прогон не держатся ни соединение, ни снимок данных,
+    мешающий vacuum.
+    """
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            user_ids = (await session.scalars(
+                select(User.id).where(User.is_active, User.id > last_id).order_by(User.id).limit(batch_size))).all()
+        if not user_ids:
+            return
+        for user_id in user_ids:
+            yield user_id
+        last_id = user_ids[-1]
+
+
+async def reallocate_user(user_id: int, args, progress: Progress, slots: asyncio.Semaphore):
+    try:
+        async with session_factory() as session:
+            await owner_allocate(session, redis_service.client, user_id, args.method, args.start_date)
+    except Exception:
+        logger.exception(f"Re-allocation failed for user {user_id}")
+        progress.failed_user_ids.append(user_id)
+    else:
+        progress.done += 1
+    finally:
+        slots.release()
+        progress.report()
+
+
+async def main() -> int:
+    args = parse_args()
+    logging.config.dictConfig(log_config)
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    # Очередь пула должна вмещать все одновременно обрабатываемые пользователи
+    settings.ALLOCATION_EXECUTOR = "process"
+    settings.ALLOCATION_POOL_SIZE = args.workers
+    settings.ALLOCATION_MAX_QUEUE_DEPTH = max(settings.ALLOCATION_MAX_QUEUE_DEPTH, args.db_concurrency)
+
+    await redis_service.connect()
+    allocation_executor.start()
+    progress = Progress()
+    slots = asyncio.Semaphore(args.db_concurrency)
+    running = set()
+    try:
+        async for user_id in active_user_ids():
+            await slots.acquire()
+            job = asyncio.create_task(reallocate_user(user_id, args, progress, slots))
+            running.add(job)
+            job.add_done_callback(running.discard)
+        await asyncio.gather(*running)
+    finally:
+        allocation_executor.shutdown()
+        await redis_service.close()
+
+    progress.report(force=True)
+    if progress.failed_user_ids:
+        logger.error(f"Failed user ids: {progress.failed_user_ids}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
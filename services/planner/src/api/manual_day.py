@@ -1,18 +1,27 @@
-from fastapi import Depends, APIRouter, Request
+from fastapi import Depends, APIRouter, Request, Response
+from pydantic import TypeAdapter
 
+from src.core.cache import CacheTag, cached
 from src.core.dependencies import db_dep, redis_dep
-from src.core.cache import delete_cache_by_prefix
+from src.core.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encoded_response, negotiate_media_type
+from src.core.schedule_version import commit_and_invalidate
 
 from src.crud import manual_day_crud
 from src.schemas import manual_day as schemas
 
 router = APIRouter(prefix="/manual_days", tags=["ManualDays"])
 
+manual_days_adapter = TypeAdapter(list[schemas.ManualDaySchema])
+
 
 @router.get("")
-async def list_manual_days(request: Request, session: db_dep) -> list[
+@cached(CacheTag.manual_days)
+async def list_manual_days(request: Request, response: Response, session: db_dep, redis: redis_dep) -> list[
     schemas.ManualDaySchema]:
-    return await manual_day_crud.schema_owner_list(session, owner_id=request.state.user_id)
+    response.headers["Vary"] = "Accept"
+    media_type = negotiate_media_type(request, (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE))
+    manual_days = await manual_day_crud.schema_owner_list(session, owner_id=request.state.user_id)
+    return encoded_response(manual_days, manual_days_adapter, media_type, response.headers)
 
 
 @router.post("")
@@ -20,15 +29,13 @@ async def create_manual_day(request: Request, manual_day_schema: schemas.CreateM
                             session: db_dep, redis: redis_dep) -> schemas.ManualDaySchema:
     user_id = request.state.user_id
     manual_day_schema = await manual_day_crud.schema_owner_create(session, manual_day_schema, user_id)
-    await session.commit()
-    
-    # Изменение ручных дней влияет на будущие аллокации
-    await delete_cache_by_prefix(redis, f"planner:calendar:{user_id}")
-    await delete_cache_by_prefix(redis, f"planner:calendar_with_tasks:{user_id}")
-    
+    # Изменение ручных дней влияет на будущие аллокации, кэш пользователя сбрасывается после коммита
+    await commit_and_invalidate(session, redis)
     return manual_day_schema
 
 
 @router.get("/{manual_day_id}")
-async def get_manual_day(request: Request, manual_day_id: int, session: db_dep) -> schemas.ManualDaySchema:
+@cached(CacheTag.manual_days)
+async def get_manual_day(request: Request, manual_day_id: int, session: db_dep,
+                         redis: redis_dep) -> schemas.ManualDaySchema:
     return await manual_day_crud.schema_owner_get(session, manual_day_id, request.state.user_id)
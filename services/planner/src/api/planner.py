@@ -1,140 +1,246 @@
 import logging
 
 import datetime as dt
-from enum import Enum
 from pydantic import TypeAdapter
 
-from fastapi import Depends, APIRouter, Request
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-
-import task_planner as tp
-
-from src.core.dependencies import db_dep, redis_dep
-from src.core.cache import get_cache, set_cache, delete_cache_by_prefix
-from src.core.rate_limit import RateLimiter
-
+from fastapi import Depends, APIRouter, Request, Response, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.config import settings
+from src.core.dependencies import db_dep, redis_dep, admin_id_dep
+from src.core.cache import CacheTag, cache_metrics, cached, generation_key, get_or_compute
+from src.core.calendar_cache import (CALENDAR_CACHE_PREFIX, CALENDAR_WITH_TASKS_CACHE_PREFIX, CalendarIndex,
+                                     calendar_cache_key, calendar_cache_start, calendar_index_key, read_calendar_days,
+                                     read_calendar_window_dates, store_calendar_days, task_executions_day_adapter,
+                                     task_executions_days_adapter, tasks_day_adapter, tasks_days_adapter)
+from src.core.pagination import (decode_date_cursor, set_next_cursor_header, set_next_cursor_header_from_date,
+                                 set_next_date_cursor_header)
+from src.core.rate_limit import RateLimiter
+from src.core.responses import (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE, encode_body, encoded_response,
+                                ndjson_lines, negotiate_media_type)
+from src.core.schedule_version import check_schedule_etag, get_request_schedule_version
+from src.core.allocation import AllocationMethod
+from src.core.allocation_horizon import allocation_end_date
+from src.core.jobs import enqueue_allocation_job, get_allocation_job
+from src.core.allocation_memo import get_allocation_memo_stats
 
 from src import schemas
-from src.models import FailedTask, TaskExecution, Day
-from src.crud import failed_task_crud, task_execution_crud, day_crud, task_crud, manual_day_crud
+from src.crud import day_crud, failed_task_crud
+from src.crud.allocation import owner_allocate, owner_allocation_comparison, owner_allocation_preview
 
 router = APIRouter(tags=["Planner"])
 
+CALENDAR_MEDIA_TYPES = (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+READ_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+normalized_calendar_adapter = TypeAdapter(schemas.day.NormalizedCalendarSchema)
+failed_tasks_adapter = TypeAdapter(list[schemas.failed_task.FailedTaskSchema])
+
 
-class AllocationMethod(Enum):
-    interest = "interest"
-    importance = "importance"
-    interest_importance = "interest_importance"
-    points_allocation = "points_allocation"
-    force_procrastinate = "force_procrastinate"
+def drop_etag(response: Response):
+    # Устаревший ответ нельзя помечать ETag текущей версии, иначе клиент будет получать на него 304
+    del response.headers["ETag"]
 
 
-name_to_method = {
-    AllocationMethod.interest: tp.Planner.interest_allocation,
-    AllocationMethod.importance: tp.Planner.importance_allocation,
-    AllocationMethod.interest_importance: tp.Planner.interest_importance_allocation,
-    AllocationMethod.points_allocation: tp.Planner.points_allocation,
-    AllocationMethod.force_procrastinate: tp.Planner.force_procrastination_allocation
-}
+async def cached_calendar_response(request: Request, response: Response, session: AsyncSession, redis: Redis,
+                                   prefix: str, media_type: str, start_date: dt.date, end_date: dt.date | None,
+                                   limit: int | None, after_date: dt.date | None, with_tasks: bool = False
+                                   ) -> Response:
+    """
+    Окно календаря из подневного кэша: тела дней расписания с calendar_cache_start(start_date) хранятся
+    одной копией на пользователя (см. store_calendar_days), а окно и страница выбираются одним ZRANGE
+    по датам индекса и читаются одним HMGET. Поэтому кэш не растёт с числом разных start_date, end_date
+    и курсоров, которыми пользуются клиенты.
+    """
+    user_id = request.state.user_id
+    # Поколение кэша - версия данных пользователя, уже прочитанная проверкой ETag
+    version = await get_request_schedule_version(request, redis)
+    index_key = calendar_index_key(prefix, user_id, media_type)
+
+    async def load_index() -> CalendarIndex:
+        cache_start = calendar_cache_start(start_date)
+        if with_tasks and settings.CALENDAR_SQL_JSON and media_type == JSON_MEDIA_TYPE:
+            # JSON дней собирается в PostgreSQL и без разбора уходит в Redis
+            bodies = await day_crud.owner_calendar_with_tasks_day_json(session, user_id, cache_start)
+        else:
+            adapter = tasks_day_adapter if with_tasks else task_executions_day_adapter
+            days = await day_crud.owner_calendar_window(session, user_id, cache_start, with_tasks=with_tasks)
+            bodies = {day.date: encode_body(day, adapter, media_type) for day in days}
+        return await store_calendar_days(redis, prefix, user_id, media_type, version, cache_start, bodies)
+
+    # Индекс без поколения можно отдать как устаревший, пока новый считает другой запрос
+    index, is_stale = await get_or_compute(redis, generation_key(index_key, version), load_index, CalendarIndex,
+                                           stale_key=f"{index_key}:stale")
+    dates = await read_calendar_window_dates(redis, prefix, user_id, media_type, index, start_date, end_date, limit,
+                                             after_date)
+    body = None
+    if dates is not None:
+        body = await read_calendar_days(redis, prefix, user_id, media_type, index.version, dates)
+    if body is None:
+        # Окно начинается раньше сохранённых дней или дней поколения индекса в Redis уже нет - читается из БД
+        days = await day_crud.owner_calendar_window(session, user_id, start_date, end_date, limit, after_date,
+                                                    with_tasks=with_tasks)
+        dates = [day.date for day in days]
+        body = encode_body(days, tasks_days_adapter if with_tasks else task_executions_days_adapter, media_type)
+        is_stale = False
+    if is_stale:
+        drop_etag(response)
+    set_next_date_cursor_header(response, dates, limit)
+    return Response(content=body, media_type=media_type, headers=response.headers)
 
 
 @router.get("/calendar", dependencies=[Depends(RateLimiter(times=100, seconds=60))])
-async def get_calendar(request: Request, session: db_dep, redis: redis_dep,
-                       start_date: dt.date = dt.date.today()) -> list[schemas.day.TaskExecutionsDaySchema]:
+async def get_calendar(request: Request, response: Response, session: db_dep, redis: redis_dep,
+                       start_date: dt.date = dt.date.today(), end_date: dt.date | None = None,
+                       limit: int | None = Query(None, ge=1, le=settings.CALENDAR_MAX_PAGE_SIZE),
+                       cursor: str | None = None) -> list[schemas.day.TaskExecutionsDaySchema]:
     user_id = request.state.user_id
-    cache_key = f"planner:calendar:{user_id}:{start_date}"
+    after_date = decode_date_cursor(cursor) if cursor is not None else None
+    cache_key = calendar_cache_key(CALENDAR_CACHE_PREFIX, user_id, start_date, end_date, limit, after_date)
+    media_type = negotiate_media_type(request, CALENDAR_MEDIA_TYPES)
+    response.headers["Vary"] = "Accept"
 
-    cached_data = await get_cache(redis, cache_key, list[schemas.day.TaskExecutionsDaySchema])
-    if cached_data is not None:
-        return cached_data
+    not_modified = await check_schedule_etag(request, response, redis, cache_key, media_type)
+    if not_modified is not None:
+        return not_modified
 
-    days_stmt = select(Day).options(selectinload(Day.task_executions)).where(Day.owner_id == user_id,
-                                                                             Day.date >= start_date)
-    days = (await session.scalars(days_stmt)).all()
+    if media_type == NDJSON_MEDIA_TYPE:
+        # Потоковый режим: по дню на строку через серверный курсор, без сборки всего календаря в памяти и без кэша
+        if limit is not None:
+            set_next_cursor_header_from_date(response, await day_crud.owner_calendar_page_last_date(
+                session, user_id, start_date, end_date, limit, after_date))
+        days = day_crud.owner_stream_calendar_window(session, user_id, start_date, end_date, limit, after_date)
+        return StreamingResponse(ndjson_lines(days, task_executions_day_adapter), media_type=NDJSON_MEDIA_TYPE,
+                                 headers=response.headers)
 
-    await set_cache(redis, cache_key, days, list[schemas.day.TaskExecutionsDaySchema])
-    return days
+    return await cached_calendar_response(request, response, session, redis, CALENDAR_CACHE_PREFIX, media_type,
+                                          start_date, end_date, limit, after_date)
 
 
 @router.get("/calendar_with_tasks", dependencies=[Depends(RateLimiter(times=100, seconds=60))])
-async def get_calendar_with_tasks(request: Request, session: db_dep, redis: redis_dep,
-                                  start_date: dt.date = dt.date.today()) -> list[schemas.day.TasksDaySchema]:
+async def get_calendar_with_tasks(request: Request, response: Response, session: db_dep, redis: redis_dep,
+                                  start_date: dt.date = dt.date.today(), end_date: dt.date | None = None,
+                                  limit: int | None = Query(None, ge=1, le=settings.CALENDAR_MAX_PAGE_SIZE),
+                                  cursor: str | None = None, normalized: bool = False
+                                  ) -> list[schemas.day.TasksDaySchema] | schemas.day.NormalizedCalendarSchema:
     user_id = request.state.user_id
-    cache_key = f"planner:calendar_with_tasks:{user_id}:{start_date}"
-
-    cached_data = await get_cache(redis, cache_key, list[schemas.day.TasksDaySchema])
-    if cached_data is not None:
-        return cached_data
-
-    days_stmt = select(Day).options(selectinload(Day.task_executions).selectinload(TaskExecution.task)).where(
-        Day.owner_id == user_id,
-        Day.date >= start_date)
-    days = (await session.scalars(days_stmt)).all()
-
-    await set_cache(redis, cache_key, days, list[schemas.day.TasksDaySchema])
-    return days
+    after_date = decode_date_cursor(cursor) if cursor is not None else None
+    cache_key = calendar_cache_key(CALENDAR_WITH_TASKS_CACHE_PREFIX, user_id, start_date, end_date, limit, after_date)
+    # Нормализованный формат - один объект, поэтому построчно (NDJSON) не отдаётся
+    media_type = negotiate_media_type(request, READ_MEDIA_TYPES if normalized else CALENDAR_MEDIA_TYPES)
+    if normalized:
+        cache_key += ":normalized"
+    response.headers["Vary"] = "Accept"
+
+    not_modified = await check_schedule_etag(request, response, redis, cache_key, media_type)
+    if not_modified is not None:
+        return not_modified
+
+    if media_type == NDJSON_MEDIA_TYPE:
+        if limit is not None:
+            set_next_cursor_header_from_date(response, await day_crud.owner_calendar_page_last_date(
+                session, user_id, start_date, end_date, limit, after_date))
+        days = day_crud.owner_stream_calendar_window(session, user_id, start_date, end_date, limit, after_date,
+                                                     with_tasks=True)
+        return StreamingResponse(ndjson_lines(days, tasks_day_adapter), media_type=NDJSON_MEDIA_TYPE,
+                                 headers=response.headers)
+
+    if normalized:
+        # Каждая задача сериализуется один раз, а не в каждом дне, где она выполняется.
+        # Значение под ключом без поколения можно отдать как устаревшее, пока новое считает другой запрос
+        stale_key = f"{cache_key}:stale"
+        cache_key = generation_key(cache_key, await get_request_schedule_version(request, redis))
+
+        async def load_calendar() -> schemas.day.NormalizedCalendarSchema:
+            return await day_crud.owner_normalized_calendar_window(session, user_id, start_date, end_date, limit,
+                                                                   after_date)
+
+        calendar, is_stale = await get_or_compute(redis, cache_key, load_calendar,
+                                                  schemas.day.NormalizedCalendarSchema, stale_key=stale_key)
+        if is_stale:
+            drop_etag(response)
+        set_next_cursor_header(response, calendar.days, limit)
+        return encoded_response(calendar, normalized_calendar_adapter, media_type, response.headers)
+
+    return await cached_calendar_response(request, response, session, redis, CALENDAR_WITH_TASKS_CACHE_PREFIX,
+                                          media_type, start_date, end_date, limit, after_date, with_tasks=True)
 
 
 @router.get("/failed_tasks")
-async def list_failed_tasks(request: Request, session: db_dep) -> list[
+@cached(CacheTag.schedule)
+async def list_failed_tasks(request: Request, response: Response, session: db_dep, redis: redis_dep) -> list[
     schemas.failed_task.FailedTaskSchema]:
-    return await failed_task_crud.schema_owner_list(session, owner_id=request.state.user_id)
+    media_type = negotiate_media_type(request, READ_MEDIA_TYPES)
+    response.headers["Vary"] = "Accept"
+    not_modified = await check_schedule_etag(request, response, redis, "failed_tasks", media_type)
+    if not_modified is not None:
+        return not_modified
+
+    failed_tasks = await failed_task_crud.schema_owner_list(session, owner_id=request.state.user_id)
+    return encoded_response(failed_tasks, failed_tasks_adapter, media_type, response.headers)
 
 
 @router.post("/allocate", dependencies=[Depends(RateLimiter(times=5, seconds=60))])
 async def allocate_tasks(allocation_method: AllocationMethod, request: Request, session: db_dep, redis: redis_dep,
-                         start_date: dt.date = dt.date.today()):
-    user_id = request.state.user_id
-    allocation_method = name_to_method.get(allocation_method, None)
-
-    # Очистка кэша перед изменением данных
-    await delete_cache_by_prefix(redis, f"planner:calendar:{user_id}")
-    await delete_cache_by_prefix(redis, f"planner:calendar_with_tasks:{user_id}")
-
-    await failed_task_crud.owner_all_delete(session, user_id)
-
-    await task_execution_crud.owner_all_delete(session, user_id)
-    await day_crud.owner_all_delete(session, user_id)
-
-    tasks_schemas = await task_crud.schema_owner_list(session, user_id)
-    tasks = []
-    for task_schema in tasks_schemas:
-        task = tp.Task(**task_schema.model_dump(exclude={"id", "owner_id"}))
-        task.db_id = task_schema.id
-        tasks.append(task)
-
-    manual_days_schemas = await manual_day_crud.schema_owner_list(session, user_id)
-    manual_days = [tp.Day(**manual_day_schema.model_dump(exclude={"id"})) for manual_day_schema in manual_days_schemas]
-
-    planner = tp.Planner(tasks=tasks, manual_days=manual_days, start_date=start_date,
-                         dflt_day_work_hours=settings.default_day_work_hours,
-                         dflt_task_work_hours=settings.default_task_work_hours)
-    allocation_method(planner)
-
-    failed_tasks = [FailedTask(task_id=failed_task.db_id, owner_id=user_id) for failed_task in planner.failed_tasks]
-    session.add_all(failed_tasks)
-
-    day_schemas = []
-    for day in planner.calendar.days:
-        task_execution_schemas = [
-            schemas.task_execution.CreateTaskExecutionSchema(task_id=task.db_id, doing_hours=doing_hours) for
-            task, doing_hours in day.schedule.items()]
-        day_schema = schemas.day.CreateTaskExecutionsDaySchema(date=day.date, work_hours=day.work_hours,
-                                                               task_executions=task_execution_schemas)
-        day_schemas.append(day_schema)
-    days = [
-        Day(
-            **day_schema.model_dump(exclude={"task_executions"}),
-            owner_id=user_id,
-            task_executions=[
-                TaskExecution(**task_execution_schema.model_dump(), owner_id=user_id) for task_execution_schema in
-                day_schema.task_executions]
-        )
-        for day_schema in day_schemas]
-    session.add_all(days)
-
-    await session.commit()
-    return {"detail": "Allocation is successful"}
-
+                         start_date: dt.date = dt.date.today(), horizon_days: int | None = Query(None, ge=1),
+                         end_date: dt.date | None = None) -> schemas.allocation.AllocationOutcomeSchema:
+    # Календарь сохраняется только до конца горизонта, задачи за его пределами возвращаются отдельно от FailedTask
+    end_date = allocation_end_date(start_date, horizon_days, end_date)
+    result = await owner_allocate(session, redis, request.state.user_id, allocation_method, start_date, end_date)
+    return schemas.allocation.AllocationOutcomeSchema(detail="Allocation is successful", end_date=end_date,
+                                                      beyond_horizon_task_ids=result.beyond_horizon_task_ids)
+
+
+@router.post("/allocate/preview", dependencies=[Depends(RateLimiter(times=20, seconds=60))])
+async def preview_allocation(allocation_method: AllocationMethod, request: Request, session: db_dep,
+                             redis: redis_dep, start_date: dt.date = dt.date.today(),
+                             horizon_days: int | None = Query(None, ge=1),
+                             end_date: dt.date | None = None) -> schemas.allocation.AllocationPreviewSchema:
+    # Расписание только считается и возвращается, сохранённый календарь не меняется
+    end_date = allocation_end_date(start_date, horizon_days, end_date)
+    result = await owner_allocation_preview(session, redis, request.state.user_id, allocation_method, start_date,
+                                            end_date)
+    failed_tasks = [schemas.failed_task.CreateFailedTaskSchema(task_id=task_id) for task_id in result.failed_task_ids]
+    return schemas.allocation.AllocationPreviewSchema(days=result.days, failed_tasks=failed_tasks,
+                                                      beyond_horizon_task_ids=result.beyond_horizon_task_ids)
+
+
+@router.get("/allocate/compare", dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+async def compare_allocation_methods(request: Request, session: db_dep, start_date: dt.date = dt.date.today(),
+                                     horizon_days: int | None = Query(None, ge=1), end_date: dt.date | None = None
+                                     ) -> list[schemas.allocation.AllocationComparisonSchema]:
+    # Все методы считаются параллельно на одних входных данных, сохранённый календарь не меняется
+    end_date = allocation_end_date(start_date, horizon_days, end_date)
+    return await owner_allocation_comparison(session, request.state.user_id, start_date, end_date)
+
+
+@router.get("/allocate/memo_stats")
+async def allocation_memo_stats(redis: redis_dep,
+                                admin_id: admin_id_dep) -> schemas.allocation.AllocationMemoStatsSchema:
+    # Сколько запусков планировщика сэкономила мемоизация результатов аллокации
+    return await get_allocation_memo_stats(redis)
+
+
+@router.get("/cache/stats")
+async def cache_stats(admin_id: admin_id_dep) -> dict[str, schemas.cache.CachePrefixStatsSchema]:
+    # Размер значений кэша, степень сжатия и время (де)сериализации по префиксам ключей в этом воркере
+    return cache_metrics.snapshot()
+
+
+@router.post("/allocate/jobs", status_code=status.HTTP_202_ACCEPTED,
+             dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+async def enqueue_allocation(allocation_method: AllocationMethod, request: Request, redis: redis_dep,
+                             start_date: dt.date = dt.date.today(), horizon_days: int | None = Query(None, ge=1),
+                             end_date: dt.date | None = None) -> schemas.allocation.AllocationJobSchema:
+    # Аллокацию выполнит воркер (worker.py), HTTP-воркер сразу возвращает id задачи
+    end_date = allocation_end_date(start_date, horizon_days, end_date)
+    return await enqueue_allocation_job(redis, request.state.user_id, allocation_method.value, start_date, end_date)
+
+
+@router.get("/allocate/jobs/{job_id}")
+async def get_allocation_job_status(job_id: str, request: Request,
+                                    redis: redis_dep) -> schemas.allocation.AllocationJobSchema:
+    job = await get_allocation_job(redis, job_id)
+    if job is None or job.owner_id != request.state.user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Allocation job not found")
+    return job
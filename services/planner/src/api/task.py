@@ -1,18 +1,32 @@
-from fastapi import Depends, APIRouter, Request
+from fastapi import Depends, APIRouter, Request, Response
+from pydantic import TypeAdapter
 
 
+from src.core.cache import CacheTag, cached
 from src.core.dependencies import db_dep, redis_dep
-from src.core.cache import delete_cache_by_prefix
+from src.core.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encoded_response, negotiate_media_type
+from src.core.schedule_version import check_schedule_etag, commit_and_invalidate
 
 from src.crud import task_crud
 from src.schemas import task as schemas
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
+tasks_adapter = TypeAdapter(list[schemas.TaskSchema])
+
 
 @router.get("")
-async def list_tasks(request: Request, session: db_dep) -> list[schemas.TaskSchema]:
-    return await task_crud.schema_owner_list(session, owner_id=request.state.user_id)
+@cached(CacheTag.tasks)
+async def list_tasks(request: Request, response: Response, session: db_dep,
+                     redis: redis_dep) -> list[schemas.TaskSchema]:
+    media_type = negotiate_media_type(request, (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE))
+    response.headers["Vary"] = "Accept"
+    not_modified = await check_schedule_etag(request, response, redis, "tasks", media_type)
+    if not_modified is not None:
+        return not_modified
+
+    tasks = await task_crud.schema_owner_list(session, owner_id=request.state.user_id)
+    return encoded_response(tasks, tasks_adapter, media_type, response.headers)
 
 
 @router.post("")
@@ -20,30 +34,21 @@ async def create_task(request: Request, task_schema: schemas.TaskSchema, session
                       redis: redis_dep) -> schemas.TaskSchema:
     user_id = request.state.user_id
     task_schema = await task_crud.schema_owner_create(session, task_schema, user_id)
-    await session.commit()
-    
-    # Изменение задач может повлиять на расписание (хотя аллокация запускается вручную, 
-    # лучше сбросить кэш, если мы кэшируем и список задач тоже в будущем)
-    await delete_cache_by_prefix(redis, f"planner:calendar:{user_id}")
-    await delete_cache_by_prefix(redis, f"planner:calendar_with_tasks:{user_id}")
-    
+    # Кэш задач и календарей пользователя сбрасывается после коммита по тегам, отмеченным task_crud
+    await commit_and_invalidate(session, redis)
     return task_schema
 
 
 @router.get("/{task_id}")
-async def get_task(request: Request, task_id: int, session: db_dep) -> schemas.TaskSchema:
+@cached(CacheTag.tasks)
+async def get_task(request: Request, task_id: int, session: db_dep, redis: redis_dep) -> schemas.TaskSchema:
     return await task_crud.schema_owner_get(session, task_id, request.state.user_id)
 
 
 @router.patch("/{task_id}")
 async def update_task(request: Request, task_schema: schemas.CreateTaskSchema, task_id: int, session: db_dep,
                       redis: redis_dep) -> schemas.TaskSchema:
-    user_id = request.state.user_id
     task_schema = await task_crud.schema_update_by_id(session, task_id, task_schema)
-    await session.commit()
-    
-    # Сбрасываем кэш, так как в calendar_with_tasks есть детали задач
-    await delete_cache_by_prefix(redis, f"planner:calendar:{user_id}")
-    await delete_cache_by_prefix(redis, f"planner:calendar_with_tasks:{user_id}")
-    
+    # Сбрасываем кэш, в том числе календарей: в calendar_with_tasks есть детали задач
+    await commit_and_invalidate(session, redis)
     return task_schema
@@ -0,0 +1,93 @@
+import datetime as dt
+import time
+from enum import Enum
+from functools import partial
+from typing import Callable
+
+import task_planner as tp
+
+from src.core.allocation_horizon import truncate_to_horizon
+from src.core.vectorized_allocation import vectorized_allocation
+from src.schemas.allocation import AllocationResultSchema
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+
+class AllocationMethod(Enum):
+    interest = "interest"
+    importance = "importance"
+    interest_importance = "interest_importance"
+    points_allocation = "points_allocation"
+    force_procrastinate = "force_procrastinate"
+    vectorized_points = "vectorized_points"
+
+
+def planner_allocation(planner_method: Callable[[tp.Planner], None], tasks_schemas: list[TaskSchema],
+                       manual_days_schemas: list[ManualDaySchema], start_date: dt.date,
+                       day_work_hours: int, task_work_hours: int) -> AllocationResultSchema:
+    tasks = []
+    for task_schema in tasks_schemas:
+        task = tp.Task(**task_schema.model_dump(exclude={"id", "owner_id"}))
+        task.db_id = task_schema.id
+        tasks.append(task)
+
+    manual_days = [tp.Day(**manual_day_schema.model_dump(exclude={"id"})) for manual_day_schema in manual_days_schemas]
+
+    planner = tp.Planner(tasks=tasks, manual_days=manual_days, start_date=start_date,
+                         dflt_day_work_hours=day_work_hours,
+                         dflt_task_work_hours=task_work_hours)
+    planner_method(planner)
+
+    day_schemas = []
+    for day in planner.calendar.days:
+        task_execution_schemas = [
+            CreateTaskExecutionSchema(task_id=task.db_id, doing_hours=doing_hours) for
+            task, doing_hours in day.schedule.items()]
+        day_schema = CreateTaskExecutionsDaySchema(date=day.date, work_hours=day.work_hours,
+                                                   task_executions=task_execution_schemas)
+        day_schemas.append(day_schema)
+
+    return AllocationResultSchema(days=day_schemas,
+                                  failed_task_ids=[failed_task.db_id for failed_task in planner.failed_tasks])
+
+
+name_to_method = {
+    AllocationMethod.interest: partial(planner_allocation, tp.Planner.interest_allocation),
+    AllocationMethod.importance: partial(planner_allocation, tp.Planner.importance_allocation),
+    AllocationMethod.interest_importance: partial(planner_allocation, tp.Planner.interest_importance_allocation),
+    AllocationMethod.points_allocation: partial(planner_allocation, tp.Planner.points_allocation),
+    AllocationMethod.force_procrastinate: partial(planner_allocation, tp.Planner.force_procrastination_allocation),
+    AllocationMethod.vectorized_points: vectorized_allocation
+}
+
+
+def run_allocation(allocation_method: AllocationMethod, tasks_schemas: list[TaskSchema],
+                   manual_days_schemas: list[ManualDaySchema], start_date: dt.date,
+                   day_work_hours: int, task_work_hours: int,
+                   end_date: dt.date | None = None) -> AllocationResultSchema:
+    """
+    Строит расписание выбранным методом. Функция чистая и принимает только сериализуемые аргументы,
+    поэтому может выполняться в отдельном процессе пула.
+    Если задан end_date, календарь обрезается по горизонту прямо в процессе пула,
+    чтобы не передавать обратно и не сохранять дни за его пределами.
+    """
+    result = name_to_method[allocation_method](tasks_schemas, manual_days_schemas, start_date,
+                                               day_work_hours, task_work_hours)
+    if end_date is not None:
+        result = truncate_to_horizon(result, end_date)
+    return result
+
+
+def timed_run_allocation(allocation_method: AllocationMethod, tasks_schemas: list[TaskSchema],
+                         manual_days_schemas: list[ManualDaySchema], start_date: dt.date,
+                         day_work_hours: int, task_work_hours: int,
+                         end_date: dt.date | None = None) -> tuple[AllocationResultSchema, float]:
+    """
+    run_allocation с замером чистого времени вычисления внутри процесса пула, без ожидания в очереди.
+    """
+    time_start = time.perf_counter()
+    result = run_allocation(allocation_method, tasks_schemas, manual_days_schemas, start_date,
+                            day_work_hours, task_work_hours, end_date)
+    return result, time.perf_counter() - time_start
@@ -0,0 +1,41 @@
+import datetime as dt
+
+from fastapi import HTTPException, status
+
+from src.core.config import settings
+from src.schemas.allocation import AllocationResultSchema
+
+
+def allocation_end_date(start_date: dt.date, horizon_days: int | None = None,
+                        end_date: dt.date | None = None) -> dt.date:
+    """
+    Последний день, до которого материализуется календарь. Берётся самая ранняя из границ:
+    horizon_days, end_date и серверный максимум ALLOCATION_MAX_HORIZON_DAYS.
+    """
+    end_dates = [start_date + dt.timedelta(days=settings.ALLOCATION_MAX_HORIZON_DAYS - 1)]
+    if horizon_days is not None:
+        end_dates.append(start_date + dt.timedelta(days=horizon_days - 1))
+    if end_date is not None:
+        end_dates.append(end_date)
+
+    resolved_end_date = min(end_dates)
+    if resolved_end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="end_date must not be earlier than start_date")
+    return resolved_end_date
+
+
+def truncate_to_horizon(result: AllocationResultSchema, end_date: dt.date) -> AllocationResultSchema:
+    """
+    Отбрасывает дни после end_date. Задачи, выполнение которых не укладывается в горизонт,
+    попадают в beyond_horizon_task_ids; их выполнения внутри горизонта сохраняются.
+    """
+    days = []
+    beyond_horizon_task_ids = {}
+    for day in result.days:
+        if day.date <= end_date:
+            days.append(day)
+        else:
+            beyond_horizon_task_ids.update(dict.fromkeys(execution.task_id for execution in day.task_executions))
+    return AllocationResultSchema.model_construct(days=days, failed_task_ids=result.failed_task_ids,
+                                                  beyond_horizon_task_ids=list(beyond_horizon_task_ids))
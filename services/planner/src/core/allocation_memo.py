@@ -0,0 +1,84 @@
+import datetime as dt
+import hashlib
+import json
+import time
+
+from redis.asyncio import Redis
+
+from src.core.config import settings
+from src.schemas.allocation import AllocationMemoStatsSchema, AllocationResultSchema
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+
+MEMO_HITS_KEY = "planner:allocation_memo:hits"
+MEMO_MISSES_KEY = "planner:allocation_memo:misses"
+# Хеши сохранённых результатов со временем их истечения: число записей без перебора ключей
+MEMO_ENTRIES_KEY = "planner:allocation_memo:entries"
+
+
+def allocation_input_hash(allocation_method: str, tasks_schemas: list[TaskSchema],
+                          manual_days_schemas: list[ManualDaySchema], start_date: dt.date,
+                          day_work_hours: int, task_work_hours: int, end_date: dt.date | None = None) -> str:
+    """
+    Стабильный хеш всех входных данных аллокации: одинаковые входы всегда дают одинаковое расписание.
+    """
+    payload = {
+        "allocation_method": allocation_method,
+        "tasks": sorted((task.model_dump(mode="json") for task in tasks_schemas), key=lambda task: task["id"]),
+        "manual_days": sorted((manual_day.model_dump(mode="json", exclude={"id"})
+                               for manual_day in manual_days_schemas), key=lambda manual_day: manual_day["date"]),
+        "start_date": start_date.isoformat(),
+        "day_work_hours": day_work_hours,
+        "task_work_hours": task_work_hours,
+        "end_date": end_date.isoformat() if end_date is not None else None,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def memo_result_key(input_hash: str) -> str:
+    return f"planner:allocation_memo:result:{input_hash}"
+
+
+def memo_applied_key(owner_id: int) -> str:
+    return f"planner:allocation_memo:applied:{owner_id}"
+
+
+async def get_memoized_allocation(redis: Redis, input_hash: str) -> AllocationResultSchema | None:
+    data = await redis.get(memo_result_key(input_hash))
+    await redis.incr(MEMO_MISSES_KEY if data is None else MEMO_HITS_KEY)
+    if data is None:
+        return None
+    return AllocationResultSchema.model_validate_json(data)
+
+
+async def set_memoized_allocation(redis: Redis, input_hash: str, result: AllocationResultSchema):
+    data = result.model_dump_json()
+    # Огромные расписания не кэшируем, чтобы не вытеснять из Redis остальные данные
+    if len(data) > settings.ALLOCATION_MEMO_MAX_BYTES:
+        return
+    await redis.setex(memo_result_key(input_hash), settings.ALLOCATION_MEMO_TTL_SECONDS, data)
+    await redis.zadd(MEMO_ENTRIES_KEY, {input_hash: time.time() + settings.ALLOCATION_MEMO_TTL_SECONDS})
+    await redis.expire(MEMO_ENTRIES_KEY, settings.ALLOCATION_MEMO_TTL_SECONDS)
+
+
+async def is_allocation_applied(redis: Redis, owner_id: int, input_hash: str) -> bool:
+    """
+    Проверяет, что в БД пользователя уже лежит результат аллокации с этим хешем.
+    """
+    return await redis.get(memo_applied_key(owner_id)) == input_hash
+
+
+async def mark_allocation_applied(redis: Redis, owner_id: int, input_hash: str):
+    await redis.setex(memo_applied_key(owner_id), settings.ALLOCATION_MEMO_TTL_SECONDS, input_hash)
+
+
+async def get_allocation_memo_stats(redis: Redis) -> AllocationMemoStatsSchema:
+    hits, misses = await redis.mget(MEMO_HITS_KEY, MEMO_MISSES_KEY)
+    hits, misses = int(hits or 0), int(misses or 0)
+    total = hits + misses
+    # Истёкшие по TTL результаты убираются из счёта записей
+    await redis.zremrangebyscore(MEMO_ENTRIES_KEY, "-inf", time.time())
+    entries = await redis.zcard(MEMO_ENTRIES_KEY)
+    return AllocationMemoStatsSchema(hits=hits, misses=misses, hit_ratio=hits / total if total else None,
+                                     entries=entries)
@@ -0,0 +1,32 @@
+from src.schemas.allocation import AllocationComparisonSchema, AllocationResultSchema
+from src.schemas.task import TaskSchema
+
+
+def summarize_allocation(allocation_method: str, result: AllocationResultSchema, tasks_schemas: list[TaskSchema],
+                         compute_time_sec: float | None) -> AllocationComparisonSchema:
+    """
+    Краткие показатели расписания для сравнения методов аллокации.
+    Запас до дедлайна - число дней между последним днём выполнения задачи и её дедлайном.
+    """
+    last_execution_dates = {}
+    hours_scheduled = 0
+    days_used = 0
+    for day in result.days:
+        if day.task_executions:
+            days_used += 1
+        for task_execution in day.task_executions:
+            hours_scheduled += task_execution.doing_hours
+            last_execution_dates[task_execution.task_id] = day.date
+
+    slacks = [(task.deadline - last_execution_dates[task.id]).days for task in tasks_schemas
+              if task.deadline is not None and task.id in last_execution_dates]
+    return AllocationComparisonSchema(
+        allocation_method=allocation_method,
+        days_used=days_used,
+        hours_scheduled=hours_scheduled,
+        failed_tasks_count=len(result.failed_task_ids),
+        last_date=max(last_execution_dates.values(), default=None),
+        min_deadline_slack_days=min(slacks, default=None),
+        avg_deadline_slack_days=sum(slacks) / len(slacks) if slacks else None,
+        compute_time_sec=compute_time_sec
+    )
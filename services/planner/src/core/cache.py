@@ -1,41 +1,499 @@
+import asyncio
+import functools
+import inspect
 import json
-from typing import Any, TypeVar, Type
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import suppress
+from enum import StrEnum
+from typing import Any, Awaitable, Callable, Optional, TypeVar, Type
+
+import msgpack
+from fastapi import Request, Response, status
 from pydantic import BaseModel, TypeAdapter
 from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+from redis.exceptions import LockError
+
+from src.core.config import settings
+from src.core.responses import JSON_MEDIA_TYPE, is_not_modified
+from src.schemas.cache import CachePrefixStatsSchema
+
+try:
+    import zstandard
+except ImportError:
+    # zstd - необязательная зависимость (extra "zstd"), по умолчанию используется zlib
+    zstandard = None
 
 T = TypeVar("T", bound=BaseModel)
 
-async def set_cache(redis: Redis, key: str, value: Any, schema: Type[T] | None = None, expire: int = 3600):
+logger = logging.getLogger("planner.cache")
+
+CACHE_LOCK_POLL_SECONDS = 0.05
+
+# Первый байт записи в Redis - формат значения
+PLAIN_FORMAT = b"\x01"
+ZLIB_FORMAT = b"\x02"
+ZSTD_FORMAT = b"\x03"
+
+if settings.CACHE_COMPRESSION == "zstd" and zstandard is None:
+    raise RuntimeError("CACHE_COMPRESSION=zstd requires the zstandard package (install the 'zstd' extra)")
+
+
+class LocalCache:
     """
-    Устанавливает значение в кэш. Если передан schema, сериализует список или объект.
+    Кэш первого уровня в памяти воркера: попадание не стоит ни запроса в Redis, ни десериализации.
+    Записи живут не дольше CACHE_L1_TTL_SECONDS, при превышении CACHE_L1_MAX_BYTES вытесняются
+    давно не использованные. Размер записи - размер её сериализованного значения.
+    Инвалидации приходят из канала CACHE_INVALIDATION_CHANNEL; если подписка прервалась,
+    кэш очищается целиком, так как сообщения за это время потеряны.
     """
-    if schema:
-        # Используем TypeAdapter для работы со списками или одиночными объектами
-        adapter = TypeAdapter(schema)
-        data = adapter.dump_json(value).decode("utf-8")
+
+    def __init__(self):
+        self.entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self.total_bytes = 0
+        self.listener: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.CACHE_L1_ENABLED
+
+    def get(self, key: str) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int):
+        self.delete(key)
+        if size > settings.CACHE_L1_MAX_BYTES:
+            return
+        self.entries[key] = (value, size, time.monotonic() + settings.CACHE_L1_TTL_SECONDS)
+        self.total_bytes += size
+        while self.total_bytes > settings.CACHE_L1_MAX_BYTES:
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def delete(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def start(self, redis: Redis):
+        if self.enabled:
+            self.listener = asyncio.create_task(self.listen_invalidations(redis))
+
+    async def shutdown(self):
+        if self.listener:
+            self.listener.cancel()
+            await asyncio.gather(self.listener, return_exceptions=True)
+            self.listener = None
+        self.clear()
+
+    async def listen_invalidations(self, redis: Redis):
+        while True:
+            try:
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                    # Всё, что закэшировано до подписки, могло пропустить инвалидацию
+                    self.clear()
+                    async for message in pubsub.listen():
+                        self.delete(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation subscription failed, resubscribing")
+                self.clear()
+                await asyncio.sleep(1)
+
+
+local_cache = LocalCache()
+# Пересчёты, уже идущие в этом воркере: параллельные промахи по ключу ждут одну задачу
+inflight_computations: dict[str, asyncio.Task] = {}
+
+
+class CacheMetrics:
+    """
+    Размер значений и время кодирования/декодирования по префиксам ключей (planner:calendar и т.п.)
+    в этом воркере: сколько памяти Redis занимают кэши и во что обходится их (рас)паковка.
+    """
+
+    def __init__(self):
+        self.prefixes: dict[str, dict[str, int | float]] = {}
+
+    def record(self, key: str, operation: str, payload_bytes: int, stored_bytes: int, seconds: float):
+        stats = self.prefixes.setdefault(cache_key_prefix(key), {
+            "writes": 0, "reads": 0, "payload_bytes": 0, "stored_bytes": 0, "encode_seconds": 0.0,
+            "decode_seconds": 0.0})
+        stats["writes" if operation == "encode" else "reads"] += 1
+        stats["payload_bytes"] += payload_bytes
+        stats["stored_bytes"] += stored_bytes
+        stats[f"{operation}_seconds"] += seconds
+
+    def snapshot(self) -> dict[str, CachePrefixStatsSchema]:
+        return {prefix: CachePrefixStatsSchema(**stats,
+                                               compression_ratio=stats["stored_bytes"] / stats["payload_bytes"]
+                                               if stats["payload_bytes"] else None)
+                for prefix, stats in self.prefixes.items()}
+
+
+cache_metrics = CacheMetrics()
+
+
+def cache_key_prefix(key: str) -> str:
+    # Префикс - сегменты ключа до первого с id, датой или хешем
+    parts = []
+    for part in key.split(":"):
+        if any(char.isdigit() for char in part):
+            break
+        parts.append(part)
+    return ":".join(parts)
+
+
+class CacheCodec:
+    """
+    Сериализация значений одной схемы в формате settings.CACHE_SERIALIZER (JSON или MessagePack).
+    TypeAdapter компилируется один раз при создании кодека, кодеки берутся из реестра codec_for.
+    """
+
+    def __init__(self, schema: Any = None):
+        self.adapter = TypeAdapter(schema) if schema is not None else None
+
+    def dumps(self, value: Any) -> bytes:
+        if self.adapter is None:
+            return json.dumps(value).encode()
+        if settings.CACHE_SERIALIZER == "msgpack":
+            return msgpack.packb(self.adapter.dump_python(value, mode="json"))
+        return self.adapter.dump_json(value)
+
+    def loads(self, payload: bytes) -> Any:
+        if self.adapter is None:
+            return json.loads(payload)
+        if settings.CACHE_SERIALIZER == "msgpack":
+            return self.adapter.validate_python(msgpack.unpackb(payload))
+        return self.adapter.validate_json(payload)
+
+
+@functools.cache
+def codec_for(schema: Any = None) -> CacheCodec:
+    return CacheCodec(schema)
+
+
+def pack_entry(payload: bytes) -> bytes:
+    """
+    Запись в Redis: байт формата и значение, сжатое settings.CACHE_COMPRESSION,
+    если оно не меньше CACHE_COMPRESSION_MIN_BYTES.
+    """
+    if len(payload) >= settings.CACHE_COMPRESSION_MIN_BYTES:
+        if settings.CACHE_COMPRESSION == "zlib":
+            return ZLIB_FORMAT + zlib.compress(payload, settings.CACHE_COMPRESSION_LEVEL)
+        if settings.CACHE_COMPRESSION == "zstd":
+            return ZSTD_FORMAT + zstandard.ZstdCompressor(level=settings.CACHE_COMPRESSION_LEVEL).compress(payload)
+    return PLAIN_FORMAT + payload
+
+
+def unpack_entry(data: bytes) -> bytes | None:
+    """
+    Значение из записи pack_entry. Запись неизвестного формата (например, сохранённая до появления
+    байта формата или сжатая zstd без установленного zstandard) считается промахом.
+    """
+    entry_format, body = data[:1], data[1:]
+    if entry_format == PLAIN_FORMAT:
+        return body
+    if entry_format == ZLIB_FORMAT:
+        return zlib.decompress(body)
+    if entry_format == ZSTD_FORMAT and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(body)
+    return None
+
+
+async def set_cache(redis: Redis, key: str, value: Any, schema: Type[T] | None = None, expire: int = 3600,
+                    raw: bool = False):
+    """
+    Устанавливает значение в кэш. Если передан schema, сериализует список или объект
+    в формате settings.CACHE_SERIALIZER (JSON или MessagePack).
+    В режиме raw value - уже готовое тело (строка или байты) и сохраняется как есть.
+    Большие значения сжимаются (см. pack_entry).
+    """
+    time_start = time.perf_counter()
+    if raw:
+        payload = value.encode() if isinstance(value, str) else value
     else:
-        data = json.dumps(value)
-    
+        payload = codec_for(schema).dumps(value)
+    data = pack_entry(payload)
+    cache_metrics.record(key, "encode", len(payload), len(data), time.perf_counter() - time_start)
+
     await redis.setex(key, expire, data)
+    if local_cache.enabled:
+        local_cache.set(key, value, len(payload))
 
-async def get_cache(redis: Redis, key: str, schema: Type[T] | None = None) -> Any:
+async def get_cache(redis: Redis, key: str, schema: Type[T] | None = None, raw: bool = False) -> Any:
     """
     Получает значение из кэша. Если передан schema, десериализует его.
+    В режиме raw возвращает сохранённые байты без разбора.
+    Запись в другом формате (например, после смены CACHE_SERIALIZER) считается промахом.
+    Если включён L1-кэш, значение сначала ищется в памяти воркера.
     """
-    data = await redis.get(key)
+    if local_cache.enabled:
+        value = local_cache.get(key)
+        if value is not None:
+            return value
+
+    # Записи - двоичные данные, читаем их в обход decode_responses клиента
+    data = await redis.execute_command("GET", key, **{NEVER_DECODE: []})
     if not data:
         return None
-    
-    if schema:
-        adapter = TypeAdapter(schema)
-        return adapter.validate_json(data)
-    
-    return json.loads(data)
 
-async def delete_cache_by_prefix(redis: Redis, prefix: str):
+    time_start = time.perf_counter()
+    try:
+        payload = unpack_entry(data)
+        if payload is None:
+            return None
+        value = payload if raw else codec_for(schema).loads(payload)
+    except (ValueError, zlib.error):
+        return None
+    cache_metrics.record(key, "decode", len(payload), len(data), time.perf_counter() - time_start)
+
+    if local_cache.enabled:
+        local_cache.set(key, value, len(payload))
+    return value
+
+def generation_key(key: str, generation: str) -> str:
+    """
+    Ключ в текущем поколении кэша. Инвалидация - смена поколения (один INCR),
+    старые записи больше не читаются и удаляются Redis по истечении TTL.
+    """
+    return f"{key}:g{generation}"
+
+
+async def invalidate_cache(redis: Redis, *keys: str):
     """
-    Удаляет все ключи по префиксу.
+    Удаляет ключи из L1-кэша этого воркера и рассылает их остальным воркерам и подам.
+    Сами значения в Redis не трогает.
+    """
+    for key in keys:
+        local_cache.delete(key)
+    if local_cache.enabled:
+        for key in keys:
+            await redis.publish(settings.CACHE_INVALIDATION_CHANNEL, key)
+
+
+async def get_or_compute(redis: Redis, key: str, compute: Callable[[], Awaitable[Any]],
+                         schema: Type[T] | None = None, expire: int = 3600, raw: bool = False,
+                         stale_key: str | None = None) -> tuple[Any, bool]:
+    """
+    Значение из кэша, а при промахе - результат compute(), который сохраняется в кэш.
+    Промахи по одному ключу пересчитываются один раз: внутри воркера запросы ждут общую задачу,
+    между воркерами и подами пересчёт защищён короткой блокировкой в Redis.
+    Если задан stale_key и CACHE_STALE_TTL_SECONDS > 0, последнее значение хранится и под ним,
+    и пока блокировку держит другой воркер, отдаётся оно.
+    Возвращает значение и признак того, что оно устаревшее.
+    """
+    while True:
+        value = await get_cache(redis, key, schema, raw)
+        if value is not None:
+            return value, False
+
+        computation = inflight_computations.get(key)
+        if computation is None:
+            # compute использует ресурсы запроса, который начал пересчёт (например, его сессию БД),
+            # поэтому пересчёт принадлежит этому запросу
+            computation = asyncio.create_task(
+                compute_single_flight(redis, key, compute, schema, expire, raw, stale_key))
+            inflight_computations[key] = computation
+            computation.add_done_callback(
+                lambda task: inflight_computations.get(key) is task and inflight_computations.pop(key))
+            try:
+                return await asyncio.shield(computation)
+            except asyncio.CancelledError:
+                # Владелец отменён (клиент отключился), его сессия закрывается - пересчёт отменяется вместе с ним
+                computation.cancel()
+                raise
+
+        try:
+            # Отмена ожидающего запроса не отменяет пересчёт для остальных
+            return await asyncio.shield(computation)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            # Отменён пересчёт владельца, а не этот запрос: начинаем пересчёт заново со своим compute
+            if inflight_computations.get(key) is computation:
+                del inflight_computations[key]
+
+
+async def compute_single_flight(redis: Redis, key: str, compute: Callable[[], Awaitable[Any]],
+                                schema: Type[T] | None, expire: int, raw: bool,
+                                stale_key: str | None) -> tuple[Any, bool]:
+    stale_enabled = stale_key is not None and settings.CACHE_STALE_TTL_SECONDS > 0
+    lock = redis.lock(f"{key}:lock", timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS)
+    if not await lock.acquire(blocking=False):
+        if stale_enabled:
+            value = await get_cache(redis, stale_key, schema, raw)
+            if value is not None:
+                return value, True
+        # Ждём, пока значение сохранит владелец блокировки
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_SECONDS)
+            value = await get_cache(redis, key, schema, raw)
+            if value is not None:
+                return value, False
+        # Владелец не успел: считаем сами, чтобы не держать запрос дольше
+        lock = None
+
+    try:
+        value = await compute()
+        await set_cache(redis, key, value, schema, expire, raw)
+        if stale_enabled:
+            await set_cache(redis, stale_key, value, schema, settings.CACHE_STALE_TTL_SECONDS, raw)
+    finally:
+        if lock is not None:
+            # Блокировка могла истечь по таймауту, тогда её уже нет
+            with suppress(LockError):
+                await lock.release()
+    return value, False
+
+
+class CacheTag(StrEnum):
+    """
+    Сущности, от которых зависят закэшированные ответы. У каждого пользователя своя версия каждого тега.
+    """
+    tasks = "tasks"
+    manual_days = "manual_days"
+    schedule = "schedule"
+
+
+# Параметры эндпоинта, которые не описывают сам ответ и не входят в ключ кэша
+NOT_CACHE_KEY_PARAMS = frozenset(("request", "response", "session", "redis"))
+
+
+def cache_tag_key(owner_id: int, tag: CacheTag) -> str:
+    return f"planner:cache_tag:{owner_id}:{tag}"
+
+
+async def get_cache_tag_versions(redis: Redis, owner_id: int, tags: tuple[CacheTag, ...]) -> list[str]:
     """
-    keys = await redis.keys(f"{prefix}*")
-    if keys:
-        await redis.delete(*keys)
+    Текущие версии тегов пользователя одним MGET (с включённым L1-кэшем - обычно без запроса в Redis).
+    """
+    keys = [cache_tag_key(owner_id, tag) for tag in tags]
+    versions = {key: local_cache.get(key) for key in keys} if local_cache.enabled else {}
+    missing_keys = [key for key in keys if versions.get(key) is None]
+    if missing_keys:
+        fetched = await redis.mget(missing_keys)
+        if None in fetched:
+            # Как и версия расписания, версия тега начинается с текущего времени,
+            # чтобы после потери ключа не прочитать записи кэша из прошлого
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, version in zip(missing_keys, fetched, strict=True):
+                    if version is None:
+                        pipe.set(key, time.time_ns(), nx=True)
+                await pipe.execute()
+            fetched = await redis.mget(missing_keys)
+        for key, version in zip(missing_keys, fetched, strict=True):
+            versions[key] = version
+            if local_cache.enabled:
+                local_cache.set(key, version, len(version))
+    return [versions[key] for key in keys]
+
+
+async def bump_cache_tags(redis: Redis, owner_id: int, *tags: CacheTag):
+    """
+    Сбрасывает все записи кэша пользователя, зависящие от tags: один INCR на тег, ключи не перебираются.
+    """
+    keys = [cache_tag_key(owner_id, tag) for tag in tags]
+    async with redis.pipeline(transaction=True) as pipe:
+        for key in keys:
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+        await pipe.execute()
+    await invalidate_cache(redis, *keys)
+
+
+def mark_cache_tags(session: Any, owner_id: int, *tags: CacheTag):
+    """
+    Вызывается CRUD-слоем при записи: запоминает в сессии, какие теги пользователя нужно сбросить после коммита.
+    """
+    session.info.setdefault("cache_tags", {}).setdefault(owner_id, set()).update(tags)
+
+
+def pop_cache_tags(session: Any) -> dict[int, set[CacheTag]]:
+    return session.info.pop("cache_tags", {})
+
+
+async def get_cached_etag(redis: Redis, key: str) -> str | None:
+    """
+    ETag закэшированного ответа: один GET короткой строки (с L1-кэшем - без запроса в Redis).
+    """
+    if local_cache.enabled:
+        etag = local_cache.get(key)
+        if etag is not None:
+            return etag
+    etag = await redis.get(key)
+    if etag is not None and local_cache.enabled:
+        local_cache.set(key, etag, len(etag))
+    return etag
+
+
+def cached(*tags: CacheTag, expire: int = 3600):
+    """
+    Кэширует ответ эндпоинта по пользователю, параметрам запроса и заголовку Accept.
+    В ключ входят версии tags, поэтому запись в любую из этих сущностей (commit_and_invalidate)
+    делает старые записи недостижимыми. Эндпоинт должен принимать request и redis.
+    Кэшируются только успешные ответы с телом. ETag ответа хранится отдельным маленьким ключом рядом с записью:
+    запрос с If-None-Match сначала сверяется с ним, и на 304 сама запись не читается и не распаковывается.
+    """
+    def decorator(endpoint: Callable[..., Awaitable[Any]]):
+        return_annotation = inspect.signature(endpoint).return_annotation
+        adapter = TypeAdapter(Any if return_annotation is inspect.Signature.empty else return_annotation)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"]
+            redis: Redis = kwargs["redis"]
+            owner_id = request.state.user_id
+            params = ":".join(f"{name}={value}" for name, value in sorted(kwargs.items())
+                              if name not in NOT_CACHE_KEY_PARAMS)
+            versions = await get_cache_tag_versions(redis, owner_id, tags)
+            key = generation_key(f"planner:cached:{endpoint.__name__}:{owner_id}:{params}:"
+                                 f"{request.headers.get('accept', '')}", "-".join(versions))
+
+            etag_key = f"{key}:etag"
+
+            if "if-none-match" in request.headers:
+                etag = await get_cached_etag(redis, etag_key)
+                if etag is not None and is_not_modified(request, etag):
+                    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+            entry = await get_cache(redis, key, raw=True)
+            if entry is not None:
+                media_type, headers, body = msgpack.unpackb(entry)
+                return Response(content=body, media_type=media_type, headers=headers)
+
+            result = await endpoint(**kwargs)
+            if not isinstance(result, Response):
+                result = Response(content=adapter.dump_json(result), media_type=JSON_MEDIA_TYPE)
+            elif result.status_code != status.HTTP_200_OK or not hasattr(result, "body"):
+                # 304, ошибки и потоковые ответы не кэшируются
+                return result
+            headers = {name: value for name, value in result.headers.items()
+                       if name not in ("content-length", "content-type")}
+            await set_cache(redis, key, msgpack.packb([result.media_type, headers, result.body]), expire=expire,
+                            raw=True)
+            if "etag" in headers:
+                await redis.setex(etag_key, expire, headers["etag"])
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,172 @@
+import datetime as dt
+import time
+from typing import Iterable, Sequence
+
+import msgpack
+from pydantic import BaseModel, TypeAdapter
+from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+
+from src.core.cache import cache_metrics, generation_key, set_cache
+from src.core.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from src.schemas.day import CreateTaskExecutionsDaySchema, TaskExecutionsDaySchema, TasksDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import TaskAndExecutionSchema
+
+CALENDAR_CACHE_PREFIX = "planner:calendar"
+CALENDAR_WITH_TASKS_CACHE_PREFIX = "planner:calendar_with_tasks"
+CALENDAR_DAYS_TTL_MARGIN_SECONDS = 60
+
+task_executions_day_adapter = TypeAdapter(TaskExecutionsDaySchema)
+tasks_day_adapter = TypeAdapter(TasksDaySchema)
+task_executions_days_adapter = TypeAdapter(list[TaskExecutionsDaySchema])
+tasks_days_adapter = TypeAdapter(list[TasksDaySchema])
+
+
+class CalendarIndex(BaseModel):
+    # Поколение, в котором лежат даты и тела дней, и первая сохранённая дата: более ранние окна читаются из БД
+    version: str
+    start_date: dt.date
+
+
+def calendar_cache_key(prefix: str, owner_id: int, start_date: dt.date, end_date: dt.date | None = None,
+                       limit: int | None = None, after_date: dt.date | None = None) -> str:
+    # Окно и курсор входят в ключ: по нему строится ETag и кэшируется нормализованный календарь
+    return f"{prefix}:{owner_id}:{start_date}:{end_date}:{limit}:{after_date}"
+
+
+def calendar_index_key(prefix: str, owner_id: int, media_type: str) -> str:
+    return f"{prefix}:index:{owner_id}:{media_type}"
+
+
+def calendar_days_key(prefix: str, owner_id: int, media_type: str, version: str) -> str:
+    return generation_key(f"{prefix}:days:{owner_id}:{media_type}", version)
+
+
+def calendar_dates_key(prefix: str, owner_id: int, media_type: str, version: str) -> str:
+    return generation_key(f"{prefix}:dates:{owner_id}:{media_type}", version)
+
+
+def calendar_cache_start(start_date: dt.date) -> dt.date:
+    """
+    Первая дата, с которой расписание кладётся в кэш: сегодняшний день или более ранний запрошенный start_date.
+    Прошедшие дни запрашиваются редко, и загружать их на каждый промах незачем.
+    """
+    return min(start_date, dt.date.today())
+
+
+async def read_calendar_window_dates(redis: Redis, prefix: str, owner_id: int, media_type: str, index: CalendarIndex,
+                                     start_date: dt.date, end_date: dt.date | None = None, limit: int | None = None,
+                                     after_date: dt.date | None = None) -> list[dt.date] | None:
+    """
+    Даты окна [start_date, end_date] после курсора after_date, не больше limit - то же окно,
+    что выбирает DayCRUD.calendar_window_stmt, но одним ZRANGE BYSCORE LIMIT по sorted set дат индекса
+    (счёт - порядковый номер даты), без чтения остальных дат расписания.
+    None, если окно начинается раньше index.start_date или дат поколения индекса в Redis уже нет.
+    """
+    first = start_date.toordinal()
+    if after_date is not None:
+        first = max(first, after_date.toordinal() + 1)
+    if first < index.start_date.toordinal():
+        return None
+    last = end_date.toordinal() if end_date is not None else "+inf"
+    key = calendar_dates_key(prefix, owner_id, media_type, index.version)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.exists(key)
+        pipe.zrange(key, first, last, byscore=True, offset=0 if limit is not None else None, num=limit)
+        exists, dates = await pipe.execute()
+    if not exists:
+        return None
+    return [dt.date.fromisoformat(date) for date in dates]
+
+
+def join_day_bodies(bodies: Sequence[bytes], media_type: str) -> bytes:
+    # Тело списка дней из готовых тел отдельных дней, без их разбора
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.Packer().pack_array_header(len(bodies)) + b"".join(bodies)
+    return b"[" + b",".join(bodies) + b"]"
+
+
+async def store_calendar_days(redis: Redis, prefix: str, owner_id: int, media_type: str, version: str,
+                              start_date: dt.date, bodies: dict[dt.date, bytes], expire: int = 3600) -> CalendarIndex:
+    """
+    Сохраняет тела дней расписания пользователя начиная с start_date в хеш поколения version (поле - дата дня),
+    а их даты - в sorted set того же поколения, и возвращает индекс. Любое окно календаря затем выбирается
+    одним ZRANGE и читается одним HMGET, поэтому на пользователя хранится одна копия расписания,
+    а не по копии на каждый start_date.
+    """
+    key = calendar_days_key(prefix, owner_id, media_type, version)
+    dates_key = calendar_dates_key(prefix, owner_id, media_type, version)
+    async with redis.pipeline(transaction=False) as pipe:
+        if bodies:
+            pipe.hset(key, mapping={date.isoformat(): body for date, body in bodies.items()})
+        # Пустой член со счётом 0 (меньше порядкового номера любой даты) не попадает ни в одно окно,
+        # но создаёт ключ и для пустого расписания, чтобы истёкшие даты отличались от пустого окна
+        pipe.zadd(dates_key, {"": 0, **{date.isoformat(): date.toordinal() for date in bodies}})
+        # Даты и тела живут чуть дольше индекса, чтобы индекс своего поколения не ссылался на истёкшие дни
+        for day_key in (key, dates_key):
+            pipe.expire(day_key, expire + CALENDAR_DAYS_TTL_MARGIN_SECONDS)
+        await pipe.execute()
+    size = sum(map(len, bodies.values()))
+    # Тела уже закодированы вызывающей стороной, учитывается только их размер
+    cache_metrics.record(key, "encode", size, size, 0.0)
+    return CalendarIndex(version=version, start_date=start_date)
+
+
+async def read_calendar_days(redis: Redis, prefix: str, owner_id: int, media_type: str, version: str,
+                             dates: Sequence[dt.date]) -> bytes | None:
+    """
+    Тело ответа со днями dates из хеша поколения version. None, если каких-то дней в хеше уже нет
+    (например, устаревший индекс пережил дни своего поколения).
+    """
+    if not dates:
+        return join_day_bodies([], media_type)
+    key = calendar_days_key(prefix, owner_id, media_type, version)
+    bodies = await redis.execute_command("HMGET", key, *(date.isoformat() for date in dates),
+                                         **{NEVER_DECODE: []})
+    if not all(bodies):
+        return None
+    time_start = time.perf_counter()
+    body = join_day_bodies(bodies, media_type)
+    cache_metrics.record(key, "decode", len(body), len(body), time.perf_counter() - time_start)
+    return body
+
+
+def planned_calendar_days(planned_days: Iterable[CreateTaskExecutionsDaySchema], day_ids: dict[dt.date, int],
+                          start_date: dt.date) -> list[TaskExecutionsDaySchema]:
+    """
+    Окно календаря с start_date в том виде, в каком его вернёт /calendar, собранное из только что
+    записанного расписания без запроса к БД.
+    """
+    return [TaskExecutionsDaySchema.model_construct(id=day_ids[day.date], date=day.date, work_hours=day.work_hours,
+                                                    task_executions=day.task_executions)
+            for day in sorted(planned_days, key=lambda day: day.date) if day.date >= start_date]
+
+
+def with_tasks(days: Iterable[TaskExecutionsDaySchema], tasks: Iterable[TaskSchema]) -> list[TasksDaySchema]:
+    tasks_by_id = {task.id: task for task in tasks}
+    return [TasksDaySchema.model_construct(
+        id=day.id, date=day.date, work_hours=day.work_hours,
+        task_executions=[TaskAndExecutionSchema.model_construct(doing_hours=execution.doing_hours,
+                                                                task=tasks_by_id[execution.task_id])
+                         for execution in day.task_executions])
+        for day in days]
+
+
+async def populate_calendar_caches(redis: Redis, owner_id: int, version: str, start_date: dt.date,
+                                   planned_days: list[CreateTaskExecutionsDaySchema], day_ids: dict[dt.date, int],
+                                   tasks: list[TaskSchema]):
+    """
+    Сквозная запись после аллокации: JSON-тела дней /calendar и /calendar_with_tasks с calendar_cache_start(start_date)
+    и их индексы сохраняются под новым поколением кэша, и первое чтение после аллокации с любым окном от этой даты
+    попадает в кэш, а не в БД. planned_days - всё расписание: owner_sync_calendar удаляет остальные дни.
+    """
+    cache_start = calendar_cache_start(start_date)
+    days = planned_calendar_days(planned_days, day_ids, cache_start)
+    for prefix, adapter, values in (
+            (CALENDAR_CACHE_PREFIX, task_executions_day_adapter, days),
+            (CALENDAR_WITH_TASKS_CACHE_PREFIX, tasks_day_adapter, with_tasks(days, tasks))):
+        bodies = {day.date: adapter.dump_json(day) for day in values}
+        index = await store_calendar_days(redis, prefix, owner_id, JSON_MEDIA_TYPE, version, cache_start, bodies)
+        await set_cache(redis, generation_key(calendar_index_key(prefix, owner_id, JSON_MEDIA_TYPE), version), index,
+                        CalendarIndex)
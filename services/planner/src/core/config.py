@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BaseModel
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -11,6 +12,9 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_PORT: int
     DB_HOST: str
+    # Пул соединений движка SQLAlchemy (по умолчанию - значения SQLAlchemy)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
 
     REDIS_HOST: str
     REDIS_PORT: int
@@ -28,6 +32,53 @@ class Settings(BaseSettings):
     default_interest: int = 5
     default_importance: int = 5
 
+    # Пул, в котором выполняется CPU-bound аллокация task_planner
+    ALLOCATION_EXECUTOR: Literal["process", "thread"] = "process"
+    ALLOCATION_POOL_SIZE: int = 2
+    ALLOCATION_MAX_QUEUE_DEPTH: int = 16
+    ALLOCATION_JOB_TIMEOUT_SECONDS: float = 30
+    # Максимальный горизонт планирования: дальше этого дня календарь не сохраняется
+    ALLOCATION_MAX_HORIZON_DAYS: int = 366
+
+    # Асинхронные задачи аллокации (Redis Streams)
+    ALLOCATION_JOBS_STREAM_MAXLEN: int = 10_000
+    ALLOCATION_JOB_TTL_SECONDS: int = 24 * 60 * 60
+    ALLOCATION_WORKER_CONCURRENCY: int = 4
+
+    # Мемоизация результатов аллокации по хешу входных данных
+    ALLOCATION_MEMO_TTL_SECONDS: int = 24 * 60 * 60
+    ALLOCATION_MEMO_MAX_BYTES: int = 1024 * 1024
+    ALLOCATION_PREVIEW_TTL_SECONDS: int = 5 * 60
+
+    # Кодирование ответов через orjson вместо стандартного json
+    FAST_JSON_RESPONSES: bool = True
+
+    # Формат значений кэша с указанной схемой: "json" или компактный двоичный "msgpack"
+    CACHE_SERIALIZER: Literal["json", "msgpack"] = "json"
+    # Сжатие значений кэша не меньше CACHE_COMPRESSION_MIN_BYTES; "zstd" требует пакет zstandard (extra "zstd")
+    CACHE_COMPRESSION: Literal["none", "zlib", "zstd"] = "zlib"
+    CACHE_COMPRESSION_MIN_BYTES: int = 4096
+    CACHE_COMPRESSION_LEVEL: int = 3
+    # Локальный (L1) кэш воркера перед Redis: LRU с TTL и ограничением по размеру значений в байтах.
+    # Согласованность между воркерами и подами - через канал Redis pub/sub с инвалидациями
+    CACHE_L1_ENABLED: bool = False
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_L1_TTL_SECONDS: float = 5
+    CACHE_INVALIDATION_CHANNEL: str = "planner:cache_invalidation"
+    # Пересчёт промаха кэша одним запросом: остальные ждут его результата не дольше CACHE_LOCK_WAIT_SECONDS.
+    # Если CACHE_STALE_TTL_SECONDS > 0, они сразу получают предыдущее значение (stale-while-revalidate)
+    CACHE_LOCK_TIMEOUT_SECONDS: float = 10
+    CACHE_LOCK_WAIT_SECONDS: float = 2
+    CACHE_STALE_TTL_SECONDS: int = 0
+
+    # Ограничение частоты запросов (RateLimiter). Отключается только для нагрузочных замеров (benchmarks/responses.py)
+    RATE_LIMIT_ENABLED: bool = True
+
+    # Максимальный размер страницы календаря (limit)
+    CALENDAR_MAX_PAGE_SIZE: int = 366
+    # JSON дней calendar_with_tasks для кэша собирается одним SQL-запросом (json_build_object) без ORM и Pydantic
+    CALENDAR_SQL_JSON: bool = False
+
     @property
     def db_url(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -3,7 +3,8 @@ from sqlalchemy.orm import DeclarativeBase
 
 from src.core.config import settings
 
-engine = create_async_engine(settings.db_url, echo=False)
+engine = create_async_engine(settings.db_url, echo=False, pool_size=settings.DB_POOL_SIZE,
+                             max_overflow=settings.DB_MAX_OVERFLOW)
 
 session_factory = async_sessionmaker(engine)
 
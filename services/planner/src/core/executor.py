@@ -0,0 +1,78 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from src.core.config import settings
+
+
+class AllocationQueueFullError(Exception):
+    pass
+
+
+class AllocationTimeoutError(Exception):
+    pass
+
+
+class AllocationExecutor:
+    """
+    Выполняет CPU-bound аллокацию вне event loop, чтобы тяжёлый запрос одного пользователя
+    не блокировал остальные запросы воркера uvicorn.
+    """
+
+    def __init__(self):
+        self.executor: Optional[Executor] = None
+        self.pending_jobs = 0
+        self.free_workers: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        if settings.ALLOCATION_EXECUTOR == "process":
+            # spawn вместо fork: форк процесса с запущенным event loop и потоками небезопасен
+            self.executor = ProcessPoolExecutor(max_workers=settings.ALLOCATION_POOL_SIZE,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=settings.ALLOCATION_POOL_SIZE,
+                                               thread_name_prefix="allocation")
+        self.free_workers = asyncio.Semaphore(settings.ALLOCATION_POOL_SIZE)
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run[T](self, func: Callable[..., T], *args) -> T:
+        if not self.executor:
+            raise RuntimeError("Allocation executor is not started. Call start() first.")
+        if self.pending_jobs >= settings.ALLOCATION_MAX_QUEUE_DEPTH:
+            raise AllocationQueueFullError("Allocation queue is full, try again later")
+
+        # Задача уходит в пул только при свободном процессе, поэтому ожидание в очереди
+        # не входит в ALLOCATION_JOB_TIMEOUT_SECONDS
+        self.pending_jobs += 1
+        try:
+            await self.free_workers.acquire()
+        except BaseException:
+            self.pending_jobs -= 1
+            raise
+
+        # Процесс и место в очереди освобождаются по завершении самой задачи, а не ожидающего её запроса,
+        # поэтому задачи, продолжающие работу после таймаута, тоже их занимают
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._job_done()
+            raise
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._job_done))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.ALLOCATION_JOB_TIMEOUT_SECONDS)
+        except TimeoutError as e:
+            raise AllocationTimeoutError(
+                f"Allocation did not finish in {settings.ALLOCATION_JOB_TIMEOUT_SECONDS} seconds") from e
+
+    def _job_done(self):
+        self.pending_jobs -= 1
+        self.free_workers.release()
+
+
+allocation_executor = AllocationExecutor()
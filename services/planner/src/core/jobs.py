@@ -0,0 +1,99 @@
+import datetime as dt
+import uuid
+from collections.abc import Container
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from src.core.config import settings
+from src.schemas.allocation import AllocationJobStatus, OwnerAllocationJobSchema
+
+ALLOCATION_JOBS_STREAM = "planner:allocation_jobs"
+ALLOCATION_JOBS_GROUP = "allocation_workers"
+
+
+def allocation_job_key(job_id: str) -> str:
+    return f"planner:allocation_job:{job_id}"
+
+
+async def save_allocation_job(redis: Redis, job: OwnerAllocationJobSchema):
+    """
+    Сохраняет состояние задачи в hash с TTL, чтобы статусы старых задач не копились в Redis.
+    """
+    key = allocation_job_key(job.id)
+    data = job.model_dump(mode="json", exclude_none=True, exclude={"wait_time_sec", "execution_time_sec"})
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=data)
+        pipe.expire(key, settings.ALLOCATION_JOB_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def get_allocation_job(redis: Redis, job_id: str) -> OwnerAllocationJobSchema | None:
+    data = await redis.hgetall(allocation_job_key(job_id))
+    if not data:
+        return None
+    return OwnerAllocationJobSchema.model_validate(data)
+
+
+async def enqueue_allocation_job(redis: Redis, owner_id: int, allocation_method: str,
+                                 start_date: dt.date, end_date: dt.date | None = None) -> OwnerAllocationJobSchema:
+    job = OwnerAllocationJobSchema(id=uuid.uuid4().hex, owner_id=owner_id, status=AllocationJobStatus.queued,
+                                   allocation_method=allocation_method, start_date=start_date, end_date=end_date,
+                                   enqueued_at=dt.datetime.now(dt.timezone.utc))
+    await save_allocation_job(redis, job)
+    await redis.xadd(ALLOCATION_JOBS_STREAM, {"job_id": job.id},
+                     maxlen=settings.ALLOCATION_JOBS_STREAM_MAXLEN, approximate=True)
+    return job
+
+
+async def create_allocation_jobs_group(redis: Redis):
+    try:
+        await redis.xgroup_create(ALLOCATION_JOBS_STREAM, ALLOCATION_JOBS_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        # Группа уже создана другим воркером
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def allocation_job_reclaim_idle_seconds() -> float:
+    # Столько сообщение без подтверждения и без refresh_allocation_job должно провисеть, чтобы его забрал другой воркер
+    return settings.ALLOCATION_JOB_TIMEOUT_SECONDS * 2
+
+
+async def read_allocation_job(redis: Redis, consumer: str, block_ms: int = 5000,
+                              held_message_ids: Container[str] = ()) -> tuple[str, str] | None:
+    """
+    Возвращает (message_id, job_id) следующей задачи для воркера или None, если очередь пуста.
+    Сначала забирает задачи, зависшие у упавших воркеров, затем читает новые.
+    held_message_ids - задачи, которые этот воркер ещё выполняет: повторно они не возвращаются.
+    """
+    min_idle_ms = int(allocation_job_reclaim_idle_seconds() * 1000)
+    claimed = await redis.xautoclaim(ALLOCATION_JOBS_STREAM, ALLOCATION_JOBS_GROUP, consumer,
+                                     min_idle_time=min_idle_ms, count=1)
+    for message_id, fields in claimed[1]:
+        if message_id in held_message_ids:
+            continue
+        # fields пустые, если сообщение уже вытеснено из стрима по MAXLEN
+        if fields:
+            return message_id, fields["job_id"]
+        await ack_allocation_job(redis, message_id)
+
+    response = await redis.xreadgroup(ALLOCATION_JOBS_GROUP, consumer, {ALLOCATION_JOBS_STREAM: ">"},
+                                      count=1, block=block_ms)
+    for _, messages in response or []:
+        for message_id, fields in messages:
+            return message_id, fields["job_id"]
+    return None
+
+
+async def refresh_allocation_job(redis: Redis, consumer: str, message_id: str):
+    """
+    Сбрасывает время простоя выполняющейся задачи, чтобы XAUTOCLAIM других воркеров не забрал её,
+    пока она ждёт процесс пула или считается дольше allocation_job_reclaim_idle_seconds().
+    """
+    await redis.xclaim(ALLOCATION_JOBS_STREAM, ALLOCATION_JOBS_GROUP, consumer, min_idle_time=0,
+                       message_ids=[message_id], justid=True)
+
+
+async def ack_allocation_job(redis: Redis, message_id: str):
+    await redis.xack(ALLOCATION_JOBS_STREAM, ALLOCATION_JOBS_GROUP, message_id)
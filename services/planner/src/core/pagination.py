@@ -0,0 +1,42 @@
+import base64
+import binascii
+import datetime as dt
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_date_cursor(date: dt.date) -> str:
+    """
+    Непрозрачный курсор keyset-пагинации: дата последнего отданного дня.
+    """
+    return base64.urlsafe_b64encode(date.isoformat().encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_date_cursor(cursor: str) -> dt.date:
+    try:
+        return dt.date.fromisoformat(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+
+
+def set_next_cursor_header(response: Response, days: Sequence[Any], limit: int | None):
+    """
+    Полная страница означает, что дальше могут быть дни: курсор на следующую страницу отдаётся в заголовке,
+    а тело ответа остаётся прежним списком дней.
+    """
+    set_next_date_cursor_header(response, [day.date for day in days], limit)
+
+
+def set_next_cursor_header_from_date(response: Response, last_date: dt.date | None):
+    # Курсор по уже известной дате последнего дня полной страницы (None - страница последняя)
+    if last_date is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_date_cursor(last_date)
+
+
+def set_next_date_cursor_header(response: Response, dates: Sequence[dt.date], limit: int | None):
+    # То же по одним датам страницы, когда дни отдаются готовыми телами без разбора
+    if limit is not None and dates and len(dates) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_date_cursor(dates[-1])
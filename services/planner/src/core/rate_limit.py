@@ -1,4 +1,5 @@
 from fastapi import Request, HTTPException, status
+from src.core.config import settings
 from src.core.redis import redis_service
 
 
@@ -8,6 +9,8 @@ class RateLimiter:
         self.seconds = seconds
 
     async def __call__(self, request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
         redis = redis_service.client
 
         # Пытаемся получить user_id из state (если пользователь авторизован)
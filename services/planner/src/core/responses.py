@@ -0,0 +1,96 @@
+from typing import Any, AsyncIterator, Mapping, Sequence
+
+import msgpack
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse на orjson: FastAPI передаёт сюда уже JSON-совместимые данные после сериализации по схеме,
+    остаётся только быстро закодировать их в байты.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def default_response_class(fast_json_responses: bool) -> type[JSONResponse]:
+    return FastJSONResponse if fast_json_responses else JSONResponse
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def negotiate_media_type(request: Request, supported: Sequence[str]) -> str:
+    """
+    Выбирает формат ответа по заголовку Accept с учётом q. Если ни один формат явно не запрошен,
+    возвращается первый из supported.
+    """
+    accept = request.headers.get("accept")
+    best_media_type, best_quality = supported[0], 0.0
+    if not accept:
+        return best_media_type
+
+    for accept_part in accept.split(","):
+        media_type, *params = (item.strip() for item in accept_part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in supported and quality > best_quality:
+            best_media_type, best_quality = media_type, quality
+    return best_media_type
+
+
+async def ndjson_lines(items: AsyncIterator[Any], adapter: TypeAdapter) -> AsyncIterator[bytes]:
+    """
+    Сериализует элементы по одному: одна строка JSON на элемент.
+    """
+    async for item in items:
+        yield adapter.dump_json(item) + b"\n"
+
+
+def msgpack_response(value: Any, adapter: TypeAdapter, headers: Mapping[str, str] | None = None) -> Response:
+    """
+    Ответ в MessagePack. Значение переводится в JSON-совместимые типы (даты - строки ISO),
+    поэтому клиент получает ту же структуру, что и в JSON.
+    """
+    return Response(content=msgpack.packb(adapter.dump_python(value, mode="json")), media_type=MSGPACK_MEDIA_TYPE,
+                    headers=headers)
+
+
+def encoded_response(value: Any, adapter: TypeAdapter, media_type: str = JSON_MEDIA_TYPE,
+                     headers: Mapping[str, str] | None = None) -> Response:
+    """
+    Готовый ответ, сериализованный по схеме одним проходом (dump_json или MessagePack).
+    Response FastAPI не валидирует повторно по return-аннотации, поэтому для уже проверенных моделей
+    и ORM-объектов (сериализуются по атрибутам) пропускаются validate, jsonable-сериализация и json.dumps.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack_response(value, adapter, headers)
+    return Response(content=adapter.dump_json(value), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def encode_body(value: Any, adapter: TypeAdapter, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """
+    Тело ответа в байтах - в том же виде его можно сохранить в кэш и отдавать при попадании без разбора.
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(adapter.dump_python(value, mode="json"))
+    return adapter.dump_json(value)
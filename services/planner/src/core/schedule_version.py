@@ -0,0 +1,99 @@
+import hashlib
+import time
+
+from fastapi import Request, Response, status
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import bump_cache_tags, invalidate_cache, local_cache, pop_cache_tags
+from src.core.responses import is_not_modified
+
+
+def schedule_version_key(owner_id: int) -> str:
+    return f"planner:schedule_version:{owner_id}"
+
+
+async def get_schedule_version(redis: Redis, owner_id: int) -> str:
+    """
+    Версия данных планировщика пользователя (задачи, ручные дни, расписание). В обычном случае - один GET,
+    а с включённым L1-кэшем - ни одного, пока версия не изменится.
+    """
+    key = schedule_version_key(owner_id)
+    if local_cache.enabled:
+        version = local_cache.get(key)
+        if version is not None:
+            return version
+    version = await redis.get(key)
+    if version is None:
+        # Версия начинается с текущего времени, чтобы после потери ключа не повторить уже выданные ETag
+        await redis.set(key, time.time_ns(), nx=True)
+        version = await redis.get(key)
+    if local_cache.enabled:
+        local_cache.set(key, version, len(version))
+    return version
+
+
+async def get_request_schedule_version(request: Request, redis: Redis) -> str:
+    """
+    Версия данных текущего пользователя, прочитанная не больше одного раза за запрос:
+    ей пользуются и проверка ETag, и ключи кэша.
+    """
+    version = getattr(request.state, "schedule_version", None)
+    if version is None:
+        version = await get_schedule_version(redis, request.state.user_id)
+        request.state.schedule_version = version
+    return version
+
+
+async def bump_schedule_version(redis: Redis, owner_id: int) -> str:
+    """
+    Вызывается после коммита любой записи, меняющей задачи, ручные дни или расписание пользователя.
+    Версия одновременно служит поколением кэша пользователя (см. generation_key): после INCR
+    все его записи в кэше перестают читаться и истекают по TTL, перебирать ключи не нужно.
+    Возвращает новую версию.
+    """
+    key = schedule_version_key(owner_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(key, time.time_ns(), nx=True)
+        pipe.incr(key)
+        _, version = await pipe.execute()
+    # Воркеры с L1-кэшем должны перечитать версию, а вместе с ней и поколение кэша
+    await invalidate_cache(redis, key)
+    return str(version)
+
+
+async def commit_and_invalidate(session: AsyncSession, redis: Redis) -> dict[int, str]:
+    """
+    Коммитит сессию, затем сбрасывает кэш по тегам, которые CRUD-слой отметил при записи (mark_cache_tags),
+    и меняет версию расписания каждого затронутого пользователя. До коммита кэш не трогается,
+    иначе параллельный запрос успел бы закэшировать старые данные под новой версией.
+    Возвращает новые версии расписания по пользователям.
+    """
+    await session.commit()
+    versions = {}
+    for owner_id, tags in pop_cache_tags(session).items():
+        await bump_cache_tags(redis, owner_id, *tags)
+        versions[owner_id] = await bump_schedule_version(redis, owner_id)
+    return versions
+
+
+def schedule_etag(version: str, *representation) -> str:
+    """
+    Сильный ETag: версия данных плюс короткий хеш параметров представления (пользователь, окно дат и т.п.),
+    чтобы, например, /calendar на разные start_date не получал одинаковый ETag.
+    """
+    digest = hashlib.blake2b(":".join(map(str, representation)).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+async def check_schedule_etag(request: Request, response: Response, redis: Redis, *representation) -> Response | None:
+    """
+    Возвращает 304, если у клиента актуальная версия, иначе проставляет ETag в ответ и возвращает None.
+    Проверка стоит одного GET в Redis и выполняется до обращения к БД и к кэшу.
+    """
+    user_id = request.state.user_id
+    etag = schedule_etag(await get_request_schedule_version(request, redis), user_id, *representation)
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,121 @@
+import datetime as dt
+
+import numpy as np
+
+from src.core.config import settings
+from src.schemas.allocation import AllocationResultSchema
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+# Вес срочности: задача с дедлайном сегодня получает +URGENCY_WEIGHT к сумме интереса и важности
+URGENCY_WEIGHT = 10
+NO_DEADLINE = np.iinfo(np.int64).max
+
+
+def score_tasks(interest: np.ndarray, importance: np.ndarray, days_to_deadline: np.ndarray) -> np.ndarray:
+    urgency = np.zeros(len(days_to_deadline), dtype=np.float64)
+    has_deadline = days_to_deadline != NO_DEADLINE
+    urgency[has_deadline] = URGENCY_WEIGHT / (1 + np.maximum(days_to_deadline[has_deadline], 0))
+    return interest + importance + urgency
+
+
+def day_capacities(manual_days_schemas: list[ManualDaySchema], start_date: dt.date, day_work_hours: int,
+                   total_hours: int) -> np.ndarray:
+    """
+    Рабочие часы по дням начиная со start_date, ровно на столько дней, чтобы вместить total_hours.
+    """
+    manual_offsets = {(manual_day.date - start_date).days: manual_day.work_hours or 0
+                      for manual_day in manual_days_schemas if manual_day.date >= start_date}
+    days_count = max(manual_offsets, default=-1) + 1
+    if day_work_hours > 0:
+        days_count = max(days_count, len(manual_offsets) + -(-total_hours // day_work_hours))
+    capacities = np.full(days_count, day_work_hours, dtype=np.int64)
+    for offset, work_hours in manual_offsets.items():
+        capacities[offset] = work_hours
+
+    # Остаток после ручных дней добираем днями по умолчанию
+    missing_hours = total_hours - int(capacities.sum())
+    if missing_hours > 0 and day_work_hours > 0:
+        capacities = np.concatenate(
+            (capacities, np.full(-(-missing_hours // day_work_hours), day_work_hours, dtype=np.int64)))
+    return capacities
+
+
+def vectorized_allocation(tasks_schemas: list[TaskSchema], manual_days_schemas: list[ManualDaySchema],
+                          start_date: dt.date, day_work_hours: int, task_work_hours: int) -> AllocationResultSchema:
+    """
+    Аллокация на массивах NumPy. Задачи сортируются по баллу (интерес + важность + срочность)
+    и укладываются подряд на ось рабочих часов; дни, в которые попадает задача,
+    находятся через searchsorted по накопленной вместимости дней.
+    Задачи, не успевающие к дедлайну, снимаются, и раскладка повторяется без них.
+    """
+    task_ids = np.array([task.id for task in tasks_schemas], dtype=np.int64)
+    interest = np.array([task.interest or settings.default_interest for task in tasks_schemas], dtype=np.float64)
+    importance = np.array([task.importance or settings.default_importance for task in tasks_schemas],
+                          dtype=np.float64)
+    work_hours = np.array([task.work_hours or task_work_hours for task in tasks_schemas], dtype=np.int64)
+    days_to_deadline = np.array([(task.deadline - start_date).days if task.deadline else NO_DEADLINE
+                                 for task in tasks_schemas], dtype=np.int64)
+
+    score = score_tasks(interest, importance, days_to_deadline)
+    # По убыванию балла, при равенстве - раньше дедлайн, затем меньший id
+    order = np.lexsort((task_ids, days_to_deadline, -score))
+    order = order[days_to_deadline[order] >= 0]
+
+    capacities = day_capacities(manual_days_schemas, start_date, day_work_hours, int(work_hours[order].sum()))
+    capacity_ends = np.cumsum(capacities)
+
+    def finish_days_for(task_ends: np.ndarray) -> np.ndarray:
+        return np.searchsorted(capacity_ends, task_ends, side="left")
+
+    def is_late(finish_days: np.ndarray) -> np.ndarray:
+        return (finish_days > days_to_deadline[order]) | (finish_days >= len(capacities))
+
+    while True:
+        ordered_hours = work_hours[order]
+        task_ends = np.cumsum(ordered_hours)
+        finish_days = finish_days_for(task_ends)
+        late = is_late(finish_days)
+        if not late.any():
+            break
+        # Снимаем только задачи, которые опаздывают даже если убрать все опаздывающие перед ними:
+        # такие точно не успевают. Первая опаздывающая задача всегда среди них, поэтому цикл конечен
+        on_time_hours = np.where(late, 0, ordered_hours)
+        best_case_ends = np.cumsum(on_time_hours) - on_time_hours + ordered_hours
+        order = order[~(late & is_late(finish_days_for(best_case_ends)))]
+
+    task_starts = task_ends - work_hours[order]
+    first_days = np.searchsorted(capacity_ends, task_starts, side="right")
+    spans = finish_days - first_days + 1
+
+    # Разворачиваем каждую задачу в пары (задача, день) по всем дням, которые она занимает
+    execution_tasks = np.repeat(np.arange(len(order)), spans)
+    execution_days = first_days[execution_tasks] + (
+            np.arange(int(spans.sum())) - np.repeat(np.cumsum(spans) - spans, spans))
+    capacity_starts = capacity_ends - capacities
+    doing_hours = (np.minimum(task_ends[execution_tasks], capacity_ends[execution_days]) -
+                   np.maximum(task_starts[execution_tasks], capacity_starts[execution_days]))
+    scheduled = doing_hours > 0
+    execution_task_ids = task_ids[order][execution_tasks[scheduled]].tolist()
+    execution_days = execution_days[scheduled]
+    doing_hours = doing_hours[scheduled].tolist()
+
+    days_count = int(execution_days[-1]) + 1 if len(execution_days) else 0
+    day_bounds = np.searchsorted(execution_days, np.arange(days_count + 1)).tolist()
+    capacities = capacities.tolist()
+    # Результат собирается из уже проверенных данных, поэтому схемы создаются без валидации
+    days = [
+        CreateTaskExecutionsDaySchema.model_construct(
+            date=start_date + dt.timedelta(days=day_number),
+            work_hours=capacities[day_number],
+            task_executions=[
+                CreateTaskExecutionSchema.model_construct(task_id=execution_task_ids[index],
+                                                          doing_hours=doing_hours[index])
+                for index in range(day_bounds[day_number], day_bounds[day_number + 1])])
+        for day_number in range(days_count)]
+
+    scheduled_ids = set(task_ids[order].tolist())
+    failed_task_ids = [task_id for task_id in task_ids.tolist() if task_id not in scheduled_ids]
+    return AllocationResultSchema.model_construct(days=days, failed_task_ids=failed_task_ids)
@@ -0,0 +1,130 @@
+import asyncio
+import datetime as dt
+import logging
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.allocation import AllocationMethod, run_allocation, timed_run_allocation
+from src.core.allocation_horizon import allocation_end_date
+from src.core.allocation_memo import (allocation_input_hash, get_memoized_allocation, set_memoized_allocation,
+                                      is_allocation_applied, mark_allocation_applied)
+from src.core.allocation_summary import summarize_allocation
+from src.core.cache import get_cache, set_cache
+from src.core.calendar_cache import populate_calendar_caches
+from src.core.config import settings
+from src.core.executor import allocation_executor
+from src.core.schedule_version import commit_and_invalidate
+from src.crud.day import day_crud
+from src.crud.failed_task import failed_task_crud
+from src.crud.manual_day import manual_day_crud
+from src.crud.task import task_crud
+from src.schemas.allocation import AllocationComparisonSchema, AllocationResultSchema
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+
+logger = logging.getLogger("planner.allocation")
+
+
+async def owner_allocation_input(session: AsyncSession, owner_id: int, allocation_method: AllocationMethod,
+                                 start_date: dt.date,
+                                 end_date: dt.date) -> tuple[list[TaskSchema], list[ManualDaySchema], str]:
+    """
+    Загружает входные данные аллокации пользователя и считает их хеш.
+    """
+    tasks_schemas = await task_crud.schema_owner_list(session, owner_id)
+    manual_days_schemas = await manual_day_crud.schema_owner_list(session, owner_id)
+    input_hash = allocation_input_hash(allocation_method.value, tasks_schemas, manual_days_schemas, start_date,
+                                       settings.default_day_work_hours, settings.default_task_work_hours, end_date)
+    return tasks_schemas, manual_days_schemas, input_hash
+
+
+async def compute_allocation(allocation_method: AllocationMethod, tasks_schemas: list[TaskSchema],
+                             manual_days_schemas: list[ManualDaySchema], start_date: dt.date,
+                             end_date: dt.date) -> AllocationResultSchema:
+    return await allocation_executor.run(run_allocation, allocation_method, tasks_schemas, manual_days_schemas,
+                                         start_date, settings.default_day_work_hours,
+                                         settings.default_task_work_hours, end_date)
+
+
+async def owner_allocate(session: AsyncSession, redis: Redis, owner_id: int, allocation_method: AllocationMethod,
+                         start_date: dt.date, end_date: dt.date | None = None) -> AllocationResultSchema:
+    """
+    Перестраивает расписание пользователя и коммитит его. Общая логика для POST /allocate и воркера очереди.
+    Календарь сохраняется не дальше end_date (и не дальше серверного максимума горизонта).
+    Результат мемоизируется по хешу входных данных: при совпадении хеша планировщик не запускается,
+    а если этот результат уже записан в БД, пропускается и запись.
+    После коммита дни расписания с сегодняшнего дня (или с более раннего start_date) сразу записываются
+    в подневный кэш календарей, и следующее чтение любого окна с этой даты не обращается к БД.
+    """
+    end_date = allocation_end_date(start_date, end_date=end_date)
+    tasks_schemas, manual_days_schemas, input_hash = await owner_allocation_input(session, owner_id,
+                                                                                  allocation_method, start_date,
+                                                                                  end_date)
+
+    result = await get_memoized_allocation(redis, input_hash)
+    if result is not None and await is_allocation_applied(redis, owner_id, input_hash):
+        return result
+
+    if result is None:
+        result = await compute_allocation(allocation_method, tasks_schemas, manual_days_schemas, start_date,
+                                          end_date)
+        await set_memoized_allocation(redis, input_hash, result)
+
+    # Записываем только отличия от сохранённого расписания, а не пересоздаём его целиком
+    await failed_task_crud.owner_sync(session, owner_id, result.failed_task_ids)
+    calendar_diff = await day_crud.owner_sync_calendar(session, owner_id, result.days)
+    # Новая версия данных сбрасывает кэш календарей пользователя. Версия меняется только после коммита,
+    # поэтому ответ, прочитанный до него, не попадёт в кэш под новым поколением
+    version = (await commit_and_invalidate(session, redis))[owner_id]
+    try:
+        await populate_calendar_caches(redis, owner_id, version, start_date, result.days, calendar_diff.day_ids,
+                                       tasks_schemas)
+    except Exception:
+        # Сквозная запись - только оптимизация: расписание уже закоммичено, кэш заполнится при чтении
+        logger.exception(f"Calendar cache write-through failed for user {owner_id}")
+    await mark_allocation_applied(redis, owner_id, input_hash)
+    return result
+
+
+async def owner_allocation_preview(session: AsyncSession, redis: Redis, owner_id: int,
+                                   allocation_method: AllocationMethod, start_date: dt.date,
+                                   end_date: dt.date | None = None) -> AllocationResultSchema:
+    """
+    Считает расписание без записи в БД. Результат кэшируется на короткое время по хешу входных данных.
+    """
+    end_date = allocation_end_date(start_date, end_date=end_date)
+    tasks_schemas, manual_days_schemas, input_hash = await owner_allocation_input(session, owner_id,
+                                                                                  allocation_method, start_date,
+                                                                                  end_date)
+    cache_key = f"planner:allocation_preview:{owner_id}:{input_hash}"
+
+    result = await get_cache(redis, cache_key, AllocationResultSchema)
+    if result is None:
+        result = await compute_allocation(allocation_method, tasks_schemas, manual_days_schemas, start_date,
+                                          end_date)
+        await set_cache(redis, cache_key, result, AllocationResultSchema,
+                        expire=settings.ALLOCATION_PREVIEW_TTL_SECONDS)
+    return result
+
+
+async def owner_allocation_comparison(session: AsyncSession, owner_id: int, start_date: dt.date,
+                                      end_date: dt.date | None = None) -> list[AllocationComparisonSchema]:
+    """
+    Считает расписание всеми методами без записи в БД. Входные данные загружаются один раз,
+    методы выполняются параллельно, каждый отдельной задачей пула allocation_executor.
+    Горизонт ограничивается так же, как в owner_allocate, чтобы сводка совпадала с тем, что будет сохранено.
+    """
+    end_date = allocation_end_date(start_date, end_date=end_date)
+    tasks_schemas = await task_crud.schema_owner_list(session, owner_id)
+    manual_days_schemas = await manual_day_crud.schema_owner_list(session, owner_id)
+
+    allocation_methods = list(AllocationMethod)
+    timed_results = await asyncio.gather(*(
+        allocation_executor.run(timed_run_allocation, allocation_method, tasks_schemas, manual_days_schemas,
+                                start_date, settings.default_day_work_hours, settings.default_task_work_hours,
+                                end_date)
+        for allocation_method in allocation_methods
+    ))
+    return [summarize_allocation(allocation_method.value, result, tasks_schemas, compute_time_sec)
+            for allocation_method, (result, compute_time_sec) in zip(allocation_methods, timed_results, strict=True)]
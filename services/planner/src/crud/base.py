@@ -1,14 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, insert, Row
 from fastapi import HTTPException, status
 
-from typing import Iterable
+from typing import Any, Iterable, Sequence
 
+from src.core.cache import CacheTag, mark_cache_tags
 from src.core.database import Base
 from src.core.config import BaseSchema
 
 
 class BaseCRUD[ORMModel: Base]:
+    # Теги кэша, которые сбрасываются после коммита записи в эту таблицу
+    cache_tags: tuple[CacheTag, ...] = ()
+
     def __init__(self, orm_model: type[ORMModel]):
         self.orm_model = orm_model
         self.model_name = orm_model.__name__
@@ -30,12 +34,30 @@ class BaseCRUD[ORMModel: Base]:
 
     async def create(self, session: AsyncSession, obj: ORMModel) -> None:
         session.add(obj)
+        self.mark_changed(session, getattr(obj, "owner_id", None))
         await session.flush()
         await session.refresh(obj)
 
+    async def bulk_create(self, session: AsyncSession, rows: Sequence[dict[str, Any]],
+                          *returning: Any) -> Sequence[Row]:
+        """
+        Вставляет строки одним Core-запросом, минуя unit of work ORM.
+        С returning это multi-row INSERT ... RETURNING, без него - executemany.
+        """
+        if not rows:
+            return []
+        self.mark_changed(session, *{row.get("owner_id") for row in rows})
+        stmt = insert(self.orm_model.__table__)
+        if returning:
+            stmt = stmt.returning(*returning, sort_by_parameter_order=True)
+            return (await session.execute(stmt, rows)).all()
+        await session.execute(stmt, rows)
+        return []
+
     async def update(self, session: AsyncSession, obj: ORMModel, **kwargs) -> ORMModel:
         for key, val in kwargs.items():
             setattr(obj, key, val)
+        self.mark_changed(session, getattr(obj, "owner_id", None))
         await session.flush()
         await session.refresh(obj)
         return obj
@@ -45,13 +67,20 @@ class BaseCRUD[ORMModel: Base]:
         return await self.update(session, obj, **kwargs)
 
     async def delete(self, session: AsyncSession, obj: ORMModel) -> None:
+        self.mark_changed(session, getattr(obj, "owner_id", None))
         await session.delete(obj)
 
     async def owner_all_delete(self, session: AsyncSession, owner_id: int) -> None:
         self.model_has_column_check("owner_id")
         stmt = delete(self.orm_model).where(self.orm_model.owner_id == owner_id)
+        self.mark_changed(session, owner_id)
         await session.execute(stmt)
 
+    def mark_changed(self, session: AsyncSession, *owner_ids: int | None):
+        for owner_id in owner_ids:
+            if owner_id is not None and self.cache_tags:
+                mark_cache_tags(session, owner_id, *self.cache_tags)
+
     def model_has_column_check(self, column_name: str):
         if column_name not in self.orm_model.__mapper__.c:
             print(f"{self.model_name} does not have an {column_name} field")
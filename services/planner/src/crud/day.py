@@ -1,10 +1,235 @@
-from src.schemas.day import CreateDaySchema, DaySchema
-from src.models import Day
+import datetime as dt
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+from sqlalchemy import Text, cast, func, literal_column, select, delete, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.core.cache import CacheTag
+from src.schemas.day import (CreateDaySchema, DaySchema, CreateTaskExecutionsDaySchema, NormalizedCalendarSchema,
+                             NormalizedDaySchema)
+from src.schemas.task import TaskSchema
+from src.models import Day, Task, TaskExecution
 from src.crud import SchemaCRUD
+from src.crud.task_execution import task_execution_crud
+
+
+@dataclass
+class CalendarDiff:
+    new_days: list[CreateTaskExecutionsDaySchema] = field(default_factory=list)
+    updated_days: list[dict[str, Any]] = field(default_factory=list)
+    deleted_day_ids: list[int] = field(default_factory=list)
+    new_executions: list[dict[str, Any]] = field(default_factory=list)
+    updated_executions: list[dict[str, Any]] = field(default_factory=list)
+    deleted_execution_ids: list[int] = field(default_factory=list)
+    # id всех дней нового расписания по дате; id новых дней появляются после их вставки
+    day_ids: dict[dt.date, int] = field(default_factory=dict)
+
+    def __bool__(self):
+        return any((self.new_days, self.updated_days, self.deleted_day_ids,
+                    self.new_executions, self.updated_executions, self.deleted_execution_ids))
+
+
+def diff_calendar(stored_days: Iterable[Any], stored_executions: Iterable[Any],
+                  planned_days: Iterable[CreateTaskExecutionsDaySchema]) -> CalendarDiff:
+    """
+    Сравнивает сохранённое расписание с новым и возвращает только отличающиеся строки.
+    Дни сопоставляются по дате, выполнения задач внутри дня - по task_id.
+    """
+    executions_by_day_id: dict[int, dict[int, Any]] = {}
+    for execution in stored_executions:
+        executions_by_day_id.setdefault(execution.day_id, {})[execution.task_id] = execution
+
+    days_by_date: dict[dt.date, Any] = {day.date: day for day in stored_days}
+    diff = CalendarDiff()
+
+    for planned_day in planned_days:
+        stored_day = days_by_date.pop(planned_day.date, None)
+        if stored_day is None:
+            diff.new_days.append(planned_day)
+            continue
+        diff.day_ids[planned_day.date] = stored_day.id
+
+        if stored_day.work_hours != planned_day.work_hours:
+            diff.updated_days.append({"id": stored_day.id, "work_hours": planned_day.work_hours})
+
+        stored_day_executions = executions_by_day_id.get(stored_day.id, {})
+        for planned_execution in planned_day.task_executions:
+            stored_execution = stored_day_executions.pop(planned_execution.task_id, None)
+            if stored_execution is None:
+                diff.new_executions.append({"day_id": stored_day.id, **planned_execution.model_dump()})
+            elif stored_execution.doing_hours != planned_execution.doing_hours:
+                diff.updated_executions.append({"id": stored_execution.id,
+                                                "doing_hours": planned_execution.doing_hours})
+        diff.deleted_execution_ids.extend(execution.id for execution in stored_day_executions.values())
+
+    # Выполнения удаляемых дней уходят каскадом на уровне БД (ondelete="CASCADE")
+    diff.deleted_day_ids.extend(day.id for day in days_by_date.values())
+    return diff
+
+
+def normalize_calendar(days: Iterable[Any], tasks: Iterable[Any]) -> NormalizedCalendarSchema:
+    """
+    Календарь, в котором каждая задача описана один раз в tasks, а дни ссылаются на неё по id.
+    """
+    return NormalizedCalendarSchema(
+        tasks={task.id: TaskSchema.model_validate(task) for task in tasks},
+        days=[NormalizedDaySchema(date=day.date, work_hours=day.work_hours,
+                                  executions=[(execution.task_id, execution.doing_hours)
+                                              for execution in day.task_executions])
+              for day in days]
+    )
 
 
 class DayCRUD(SchemaCRUD[Day, CreateDaySchema, DaySchema]):
-    pass
+    cache_tags = (CacheTag.schedule,)
+
+    @staticmethod
+    def calendar_window_conditions(owner_id: int, start_date: dt.date, end_date: dt.date | None = None,
+                                   after_date: dt.date | None = None) -> list:
+        conditions = [Day.owner_id == owner_id, Day.date >= start_date]
+        if end_date is not None:
+            conditions.append(Day.date <= end_date)
+        if after_date is not None:
+            conditions.append(Day.date > after_date)
+        return conditions
+
+    def calendar_window_stmt(self, owner_id: int, start_date: dt.date, end_date: dt.date | None = None,
+                             limit: int | None = None, after_date: dt.date | None = None, with_tasks: bool = False):
+        """
+        Дни пользователя в окне [start_date, end_date] по возрастанию даты вместе с выполнениями задач.
+        after_date - keyset-курсор: отдаются только дни строго после него (индекс ix_days_owner_id_date).
+        """
+        executions_loader = selectinload(Day.task_executions)
+        if with_tasks:
+            executions_loader = executions_loader.selectinload(TaskExecution.task)
+
+        return (select(Day).options(executions_loader)
+                .where(*self.calendar_window_conditions(owner_id, start_date, end_date, after_date))
+                .order_by(Day.date).limit(limit))
+
+    async def owner_calendar_page_last_date(self, session: AsyncSession, owner_id: int, start_date: dt.date,
+                                            end_date: dt.date | None, limit: int,
+                                            after_date: dt.date | None = None) -> dt.date | None:
+        """
+        Дата последнего дня страницы, если страница полная, иначе None. Нужна потоковому ответу:
+        курсор следующей страницы уходит в заголовке раньше, чем сами дни.
+        """
+        stmt = (select(Day.date).where(*self.calendar_window_conditions(owner_id, start_date, end_date, after_date))
+                .order_by(Day.date).offset(limit - 1).limit(1))
+        return await session.scalar(stmt)
+
+    async def owner_calendar_window(self, session: AsyncSession, owner_id: int, start_date: dt.date,
+                                    end_date: dt.date | None = None, limit: int | None = None,
+                                    after_date: dt.date | None = None, with_tasks: bool = False) -> Sequence[Day]:
+        stmt = self.calendar_window_stmt(owner_id, start_date, end_date, limit, after_date, with_tasks)
+        return (await session.scalars(stmt)).all()
+
+    async def owner_normalized_calendar_window(self, session: AsyncSession, owner_id: int, start_date: dt.date,
+                                               end_date: dt.date | None = None, limit: int | None = None,
+                                               after_date: dt.date | None = None) -> NormalizedCalendarSchema:
+        """
+        Окно календаря в нормализованном виде: задачи загружаются одним запросом по id из выполнений окна.
+        """
+        days = await self.owner_calendar_window(session, owner_id, start_date, end_date, limit, after_date)
+        task_ids = {execution.task_id for day in days for execution in day.task_executions}
+        tasks = (await session.scalars(select(Task).where(Task.id.in_(task_ids)))).all() if task_ids else []
+        return normalize_calendar(days, tasks)
+
+    async def owner_stream_calendar_window(self, session: AsyncSession, owner_id: int, start_date: dt.date,
+                                           end_date: dt.date | None = None, limit: int | None = None,
+                                           after_date: dt.date | None = None, with_tasks: bool = False,
+                                           yield_per: int = 100) -> AsyncIterator[Day]:
+        """
+        То же окно, но через серверный курсор: в памяти одновременно не больше yield_per дней
+        (selectinload догружает выполнения для каждой пачки отдельно).
+        """
+        stmt = self.calendar_window_stmt(owner_id, start_date, end_date, limit, after_date, with_tasks)
+        days = await session.stream_scalars(stmt.execution_options(yield_per=yield_per))
+        async for day in days:
+            yield day
+            # Отданные дни больше не нужны сессии, не даём identity map расти вместе с календарём
+            session.expunge(day)
+
+    def calendar_with_tasks_json_stmt(self, owner_id: int, start_date: dt.date, end_date: dt.date | None = None):
+        """
+        Дни окна с датой и JSON-объектом дня (как TasksDaySchema), собранным в PostgreSQL через json_build_object.
+        """
+        empty_json_array = literal_column("'[]'::json")
+        task_json = func.json_build_object("name", Task.name, "deadline", Task.deadline, "interest", Task.interest,
+                                           "importance", Task.importance, "work_hours", Task.work_hours, "id", Task.id)
+        execution_json = func.json_build_object("doing_hours", TaskExecution.doing_hours, "task", task_json)
+        executions = (
+            select(func.coalesce(func.json_agg(aggregate_order_by(execution_json, TaskExecution.id)),
+                                 empty_json_array))
+            .select_from(TaskExecution)
+            .join(Task, Task.id == TaskExecution.task_id)
+            .where(TaskExecution.day_id == Day.id)
+            .scalar_subquery()
+        )
+
+        stmt = select(
+            Day.date,
+            func.json_build_object("date", Day.date, "work_hours", Day.work_hours, "id", Day.id,
+                                   "task_executions", executions).label("day_json")
+        ).where(Day.owner_id == owner_id, Day.date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(Day.date <= end_date)
+        return stmt
+
+    async def owner_calendar_with_tasks_day_json(self, session: AsyncSession, owner_id: int,
+                                                 start_date: dt.date) -> dict[dt.date, bytes]:
+        """
+        Готовый JSON каждого дня (как TasksDaySchema) по его дате, в порядке дат, без создания ORM-объектов
+        и Pydantic-моделей (для подневного кэша календаря).
+        """
+        days = self.calendar_with_tasks_json_stmt(owner_id, start_date).subquery()
+        # Приведение к text, чтобы драйвер не разбирал JSON обратно в объекты Python
+        stmt = select(days.c.date, cast(days.c.day_json, Text)).order_by(days.c.date)
+        return {date: day_json.encode() for date, day_json in (await session.execute(stmt)).all()}
+
+    async def owner_sync_calendar(self, session: AsyncSession, owner_id: int,
+                                  planned_days: Iterable[CreateTaskExecutionsDaySchema]) -> CalendarDiff:
+        """
+        Приводит сохранённое расписание пользователя к planned_days, записывая только изменения.
+        Коммит остаётся на вызывающей стороне, чтобы все изменения ушли одной транзакцией.
+        """
+        stored_days = (await session.execute(
+            select(Day.id, Day.date, Day.work_hours).where(Day.owner_id == owner_id))).all()
+        stored_executions = (await session.execute(
+            select(TaskExecution.id, TaskExecution.day_id, TaskExecution.task_id, TaskExecution.doing_hours).where(
+                TaskExecution.owner_id == owner_id))).all()
+
+        diff = diff_calendar(stored_days, stored_executions, planned_days)
+        self.mark_changed(session, owner_id)
+
+        if diff.deleted_execution_ids:
+            await session.execute(delete(TaskExecution).where(TaskExecution.id.in_(diff.deleted_execution_ids)))
+        if diff.deleted_day_ids:
+            await session.execute(delete(Day).where(Day.id.in_(diff.deleted_day_ids)))
+        if diff.updated_days:
+            await session.execute(update(Day), diff.updated_days)
+        if diff.updated_executions:
+            await session.execute(update(TaskExecution), diff.updated_executions)
+
+        # Новые дни вставляются одним INSERT ... RETURNING, чтобы получить их id для дочерних строк,
+        # затем все новые выполнения уходят одним executemany
+        day_rows = await self.bulk_create(
+            session,
+            [{**day_schema.model_dump(exclude={"task_executions"}), "owner_id": owner_id}
+             for day_schema in diff.new_days],
+            Day.id, Day.date)
+        day_ids = {row.date: row.id for row in day_rows}
+        diff.day_ids.update(day_ids)
+
+        new_executions = [{**execution, "owner_id": owner_id} for execution in diff.new_executions]
+        new_executions.extend(
+            {**task_execution_schema.model_dump(), "day_id": day_ids[day_schema.date], "owner_id": owner_id}
+            for day_schema in diff.new_days for task_execution_schema in day_schema.task_executions)
+        await task_execution_crud.bulk_create(session, new_executions)
+        return diff
 
 
 day_crud: DayCRUD = DayCRUD(Day, CreateDaySchema, DaySchema)
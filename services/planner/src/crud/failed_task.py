@@ -1,10 +1,32 @@
+from typing import Iterable
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import CacheTag
 from src.schemas.failed_task import CreateFailedTaskSchema, FailedTaskSchema
 from src.models import FailedTask
 from src.crud import SchemaCRUD
 
 
 class FailedTaskCRUD(SchemaCRUD[FailedTask, CreateFailedTaskSchema, FailedTaskSchema]):
-    pass
+    cache_tags = (CacheTag.schedule,)
+
+    async def owner_sync(self, session: AsyncSession, owner_id: int, task_ids: Iterable[int]) -> None:
+        """
+        Оставляет у пользователя ровно набор task_ids, удаляя и добавляя только отличающиеся записи.
+        """
+        stored_task_ids = set((await session.scalars(
+            select(FailedTask.task_id).where(FailedTask.owner_id == owner_id))).all())
+        task_ids = set(task_ids)
+        self.mark_changed(session, owner_id)
+
+        removed_task_ids = stored_task_ids - task_ids
+        if removed_task_ids:
+            await session.execute(delete(FailedTask).where(FailedTask.owner_id == owner_id,
+                                                           FailedTask.task_id.in_(removed_task_ids)))
+        await self.bulk_create(session, [{"task_id": task_id, "owner_id": owner_id}
+                                         for task_id in task_ids - stored_task_ids])
 
 
 failed_task_crud: FailedTaskCRUD = FailedTaskCRUD(FailedTask, CreateFailedTaskSchema, FailedTaskSchema)
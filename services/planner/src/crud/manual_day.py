@@ -1,10 +1,11 @@
+from src.core.cache import CacheTag
 from src.schemas.manual_day import CreateManualDaySchema, ManualDaySchema
 from src.models import ManualDay
 from src.crud import SchemaCRUD
 
 
 class ManualDayCRUD(SchemaCRUD[ManualDay, CreateManualDaySchema, ManualDaySchema]):
-    pass
+    cache_tags = (CacheTag.manual_days,)
 
 
 manual_day_crud: ManualDayCRUD = ManualDayCRUD(ManualDay, CreateManualDaySchema, ManualDaySchema)
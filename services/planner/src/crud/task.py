@@ -1,10 +1,11 @@
+from src.core.cache import CacheTag
 from src.schemas.task import CreateTaskSchema, TaskSchema
 from src.models import Task
 from src.crud import SchemaCRUD
 
 
 class TaskCRUD(SchemaCRUD[Task, CreateTaskSchema, TaskSchema]):
-    pass
+    cache_tags = (CacheTag.tasks,)
 
 
 task_crud: TaskCRUD = TaskCRUD(Task, CreateTaskSchema, TaskSchema)
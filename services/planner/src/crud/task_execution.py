@@ -1,10 +1,11 @@
+from src.core.cache import CacheTag
 from src.schemas.task_execution import CreateTaskExecutionSchema, TaskExecutionSchema
 from src.models import TaskExecution
 from src.crud import SchemaCRUD
 
 
 class TaskExecutionCRUD(SchemaCRUD[TaskExecution, CreateTaskExecutionSchema, TaskExecutionSchema]):
-    pass
+    cache_tags = (CacheTag.schedule,)
 
 
 task_execution_crud: TaskExecutionCRUD = TaskExecutionCRUD(TaskExecution, CreateTaskExecutionSchema, TaskExecutionSchema)
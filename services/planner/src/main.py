@@ -1,25 +1,45 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request, status
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from src.api import api_router
+from src.core.cache import local_cache
+from src.core.config import settings
+from src.core.executor import AllocationQueueFullError, AllocationTimeoutError, allocation_executor
 from src.core.middleware import middleware
 from src.core.redis import redis_service
+from src.core.responses import default_response_class
 from src.core.security import oauth2_scheme
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await redis_service.connect()
+    allocation_executor.start()
+    local_cache.start(redis_service.client)
     yield
     # Shutdown
+    await local_cache.shutdown()
+    allocation_executor.shutdown()
     await redis_service.close()
 
 app = FastAPI(
     root_path="/api/planner",
     title="Planner Service",
     middleware=middleware,
+    default_response_class=default_response_class(settings.FAST_JSON_RESPONSES),
     swagger_ui_parameters={"persistAuthorization": True},
     lifespan=lifespan,
     dependencies=[Depends(oauth2_scheme)]
 )
 app.include_router(api_router)
+
+
+@app.exception_handler(AllocationQueueFullError)
+async def allocation_queue_full_handler(request: Request, exc: AllocationQueueFullError):
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)})
+
+
+@app.exception_handler(AllocationTimeoutError)
+async def allocation_timeout_handler(request: Request, exc: AllocationTimeoutError):
+    return JSONResponse(status_code=status.HTTP_504_GATEWAY_TIMEOUT, content={"detail": str(exc)})
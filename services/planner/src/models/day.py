@@ -1,5 +1,5 @@
 from sqlalchemy.orm import mapped_column, Mapped, relationship
-from sqlalchemy import CheckConstraint, ForeignKey, UniqueConstraint
+from sqlalchemy import CheckConstraint, ForeignKey, Index, UniqueConstraint
 from typing import TYPE_CHECKING
 import datetime as dt
 
@@ -14,7 +14,8 @@ class Day(Base):
     __tablename__ = "days"
     __table_args__ = (
         CheckConstraint("0 <= work_hours AND work_hours <= 24", name="check_work_hours_range"),
-        UniqueConstraint("date", "owner_id", name="unique_date_for_user_days")
+        UniqueConstraint("date", "owner_id", name="unique_date_for_user_days"),
+        Index("ix_days_owner_id_date", "owner_id", "date")
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
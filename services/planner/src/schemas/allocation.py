@@ -0,0 +1,81 @@
+import datetime as dt
+from enum import Enum
+
+from pydantic import computed_field
+
+from src.core.config import BaseSchema
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.failed_task import CreateFailedTaskSchema
+
+
+class AllocationResultSchema(BaseSchema):
+    days: list[CreateTaskExecutionsDaySchema]
+    failed_task_ids: list[int]
+    beyond_horizon_task_ids: list[int] = []
+
+
+class AllocationPreviewSchema(BaseSchema):
+    days: list[CreateTaskExecutionsDaySchema]
+    failed_tasks: list[CreateFailedTaskSchema]
+    beyond_horizon_task_ids: list[int]
+
+
+class AllocationOutcomeSchema(BaseSchema):
+    detail: str
+    end_date: dt.date
+    beyond_horizon_task_ids: list[int]
+
+
+class AllocationComparisonSchema(BaseSchema):
+    allocation_method: str
+    days_used: int
+    hours_scheduled: int
+    failed_tasks_count: int
+    last_date: dt.date | None
+    min_deadline_slack_days: int | None
+    avg_deadline_slack_days: float | None
+    compute_time_sec: float | None
+
+
+class AllocationMemoStatsSchema(BaseSchema):
+    hits: int
+    misses: int
+    hit_ratio: float | None
+    entries: int
+
+
+class AllocationJobStatus(Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class AllocationJobSchema(BaseSchema):
+    id: str
+    status: AllocationJobStatus
+    allocation_method: str
+    start_date: dt.date
+    end_date: dt.date | None = None
+    enqueued_at: dt.datetime
+    started_at: dt.datetime | None = None
+    finished_at: dt.datetime | None = None
+    error: str | None = None
+
+    @computed_field
+    @property
+    def wait_time_sec(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.enqueued_at).total_seconds()
+
+    @computed_field
+    @property
+    def execution_time_sec(self) -> float | None:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+
+class OwnerAllocationJobSchema(AllocationJobSchema):
+    owner_id: int
@@ -0,0 +1,11 @@
+from src.core.config import BaseSchema
+
+
+class CachePrefixStatsSchema(BaseSchema):
+    writes: int
+    reads: int
+    payload_bytes: int
+    stored_bytes: int
+    encode_seconds: float
+    decode_seconds: float
+    compression_ratio: float | None
@@ -2,6 +2,7 @@ from pydantic import Field
 import datetime as dt
 
 from src.core.config import BaseSchema
+from src.schemas.task import TaskSchema
 from src.schemas.task_execution import CreateTaskExecutionSchema, TaskAndExecutionSchema
 
 
@@ -28,3 +29,13 @@ class TaskExecutionsDaySchema(CreateTaskExecutionsDaySchema):
 
 class TasksDaySchema(DaySchema):
     task_executions: list[TaskAndExecutionSchema]
+
+
+class NormalizedDaySchema(CreateDaySchema):
+    # Пары [task_id, doing_hours]
+    executions: list[tuple[int, int]]
+
+
+class NormalizedCalendarSchema(BaseSchema):
+    tasks: dict[int, TaskSchema]
+    days: list[NormalizedDaySchema]
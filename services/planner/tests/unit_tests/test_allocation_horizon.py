@@ -0,0 +1,46 @@
+import datetime as dt
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.allocation_horizon import allocation_end_date, truncate_to_horizon
+from src.core.config import settings
+from src.schemas.allocation import AllocationResultSchema
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+START_DATE = dt.date(2026, 1, 1)
+
+
+def day(offset, *executions):
+    return CreateTaskExecutionsDaySchema(
+        date=START_DATE + dt.timedelta(days=offset), work_hours=4,
+        task_executions=[CreateTaskExecutionSchema(task_id=task_id, doing_hours=hours) for task_id, hours in executions]
+    )
+
+
+def test_end_date_is_earliest_bound(monkeypatch):
+    monkeypatch.setattr(settings, "ALLOCATION_MAX_HORIZON_DAYS", 30)
+
+    assert allocation_end_date(START_DATE) == START_DATE + dt.timedelta(days=29)
+    assert allocation_end_date(START_DATE, horizon_days=7) == START_DATE + dt.timedelta(days=6)
+    assert allocation_end_date(START_DATE, horizon_days=7, end_date=START_DATE) == START_DATE
+    assert allocation_end_date(START_DATE, end_date=START_DATE + dt.timedelta(days=100)) == \
+           START_DATE + dt.timedelta(days=29)
+
+
+def test_end_date_before_start_date():
+    with pytest.raises(HTTPException) as exc_info:
+        allocation_end_date(START_DATE, end_date=START_DATE - dt.timedelta(days=1))
+    assert exc_info.value.status_code == 400
+
+
+def test_truncate_to_horizon():
+    days = [day(0, (1, 4)), day(1, (1, 2), (2, 2)), day(2, (2, 1), (3, 3)), day(3, (3, 4))]
+    result = AllocationResultSchema(days=days, failed_task_ids=[4])
+
+    truncated = truncate_to_horizon(result, START_DATE + dt.timedelta(days=1))
+
+    assert [d.date for d in truncated.days] == [START_DATE, START_DATE + dt.timedelta(days=1)]
+    assert truncated.beyond_horizon_task_ids == [2, 3]
+    assert truncated.failed_task_ids == [4]
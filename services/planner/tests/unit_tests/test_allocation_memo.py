@@ -0,0 +1,79 @@
+import datetime as dt
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.allocation_memo import (MEMO_HITS_KEY, MEMO_MISSES_KEY, allocation_input_hash, get_allocation_memo_stats,
+                                      get_memoized_allocation, set_memoized_allocation)
+from src.core.config import settings
+from src.schemas.allocation import AllocationMemoStatsSchema, AllocationResultSchema
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+
+START_DATE = dt.date(2026, 1, 1)
+TASKS = [TaskSchema(id=1, name="a", work_hours=3), TaskSchema(id=2, name="b", deadline=dt.date(2026, 2, 1))]
+MANUAL_DAYS = [ManualDaySchema(id=5, date=dt.date(2026, 1, 3), work_hours=0)]
+
+
+def input_hash(**overrides):
+    arguments = dict(allocation_method="interest", tasks_schemas=TASKS, manual_days_schemas=MANUAL_DAYS,
+                     start_date=START_DATE, day_work_hours=4, task_work_hours=2)
+    arguments.update(overrides)
+    return allocation_input_hash(**arguments)
+
+
+def test_input_hash_is_stable():
+    assert input_hash() == input_hash(tasks_schemas=list(reversed(TASKS)))
+
+
+@pytest.mark.parametrize("overrides", [
+    {"allocation_method": "importance"},
+    {"start_date": START_DATE + dt.timedelta(days=1)},
+    {"day_work_hours": 5},
+    {"task_work_hours": 3},
+    {"end_date": START_DATE + dt.timedelta(days=30)},
+    {"tasks_schemas": [TASKS[0].model_copy(update={"work_hours": 4}), TASKS[1]]},
+    {"manual_days_schemas": []},
+])
+def test_input_hash_changes_with_inputs(overrides):
+    assert input_hash() != input_hash(**overrides)
+
+
+@pytest.mark.asyncio
+async def test_memoized_allocation_hit_and_miss():
+    redis = AsyncMock()
+    result = AllocationResultSchema(days=[], failed_task_ids=[2])
+
+    redis.get.return_value = None
+    assert await get_memoized_allocation(redis, "hash") is None
+    redis.incr.assert_called_with(MEMO_MISSES_KEY)
+
+    redis.get.return_value = result.model_dump_json()
+    assert await get_memoized_allocation(redis, "hash") == result
+    redis.incr.assert_called_with(MEMO_HITS_KEY)
+
+
+@pytest.mark.asyncio
+async def test_set_memoized_allocation_size_cap(monkeypatch):
+    redis = AsyncMock()
+    result = AllocationResultSchema(days=[], failed_task_ids=list(range(100)))
+
+    monkeypatch.setattr(settings, "ALLOCATION_MEMO_MAX_BYTES", 10)
+    await set_memoized_allocation(redis, "hash", result)
+    redis.setex.assert_not_called()
+
+    monkeypatch.setattr(settings, "ALLOCATION_MEMO_MAX_BYTES", 1024 * 1024)
+    await set_memoized_allocation(redis, "hash", result)
+    redis.setex.assert_called_once()
+    assert list(redis.zadd.call_args.args[1]) == ["hash"]
+
+
+@pytest.mark.asyncio
+async def test_allocation_memo_stats():
+    redis = AsyncMock()
+    redis.mget.return_value = ["3", "1"]
+    redis.zcard.return_value = 2
+
+    assert await get_allocation_memo_stats(redis) == AllocationMemoStatsSchema(hits=3, misses=1, hit_ratio=0.75,
+                                                                                entries=2)
+    redis.zremrangebyscore.assert_called_once()
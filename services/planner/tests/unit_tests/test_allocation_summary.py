@@ -0,0 +1,47 @@
+import datetime as dt
+
+from src.core.allocation_summary import summarize_allocation
+from src.schemas.allocation import AllocationResultSchema
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+START_DATE = dt.date(2026, 1, 1)
+
+
+def day(offset, *executions):
+    return CreateTaskExecutionsDaySchema(
+        date=START_DATE + dt.timedelta(days=offset), work_hours=4,
+        task_executions=[CreateTaskExecutionSchema(task_id=task_id, doing_hours=hours) for task_id, hours in executions]
+    )
+
+
+def test_summarize_allocation():
+    tasks = [
+        TaskSchema(id=1, name="first", work_hours=5, deadline=START_DATE + dt.timedelta(days=3)),
+        TaskSchema(id=2, name="second", work_hours=2, deadline=START_DATE + dt.timedelta(days=1)),
+        TaskSchema(id=3, name="no deadline", work_hours=1),
+        TaskSchema(id=4, name="failed", work_hours=1, deadline=START_DATE),
+    ]
+    result = AllocationResultSchema(days=[day(0, (1, 4)), day(1), day(2, (1, 1), (2, 2), (3, 1))],
+                                    failed_task_ids=[4])
+
+    summary = summarize_allocation("interest", result, tasks, 0.5)
+
+    assert summary.allocation_method == "interest"
+    assert summary.days_used == 2
+    assert summary.hours_scheduled == 8
+    assert summary.failed_tasks_count == 1
+    assert summary.last_date == START_DATE + dt.timedelta(days=2)
+    assert summary.min_deadline_slack_days == -1
+    assert summary.avg_deadline_slack_days == 0
+    assert summary.compute_time_sec == 0.5
+
+
+def test_summarize_empty_allocation():
+    summary = summarize_allocation("interest", AllocationResultSchema(days=[], failed_task_ids=[]), [], None)
+
+    assert summary.days_used == 0
+    assert summary.last_date is None
+    assert summary.min_deadline_slack_days is None
+    assert summary.avg_deadline_slack_days is None
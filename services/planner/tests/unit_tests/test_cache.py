@@ -1,7 +1,16 @@
+import asyncio
+
+import msgpack
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from src.core.cache import set_cache, get_cache, delete_cache_by_prefix
+from src.core import cache
+from src.core.cache import (set_cache, get_cache, get_or_compute, generation_key, invalidate_cache, local_cache,
+                            LocalCache, CacheTag, cached, mark_cache_tags, pop_cache_tags, pack_entry, unpack_entry,
+                            cache_key_prefix, CacheMetrics, codec_for)
+from src.core.config import settings
 from pydantic import BaseModel
+from fastapi import Response
+from starlette.requests import Request
 
 class MockSchema(BaseModel):
     id: int
@@ -13,13 +22,13 @@ async def test_set_get_cache_object():
     key = "test_key"
     value = MockSchema(id=1, name="test")
     
-    # Mock redis.get to return serialized value
-    redis.get.return_value = value.model_dump_json()
-    
     # Test set_cache
     await set_cache(redis, key, value, MockSchema)
     redis.setex.assert_called_once()
     
+    # Mock redis to return the stored entry
+    redis.execute_command.return_value = redis.setex.call_args.args[2]
+    
     # Test get_cache
     result = await get_cache(redis, key, MockSchema)
     assert result.id == 1
@@ -32,36 +41,296 @@ async def test_set_get_cache_list():
     key = "test_list_key"
     values = [MockSchema(id=1, name="test1"), MockSchema(id=2, name="test2")]
     
-    # Mock redis.get to return serialized list
-    from pydantic import TypeAdapter
-    adapter = TypeAdapter(list[MockSchema])
-    redis.get.return_value = adapter.dump_json(values)
-    
     # Test set_cache
     await set_cache(redis, key, values, list[MockSchema])
     redis.setex.assert_called_once()
     
+    # Mock redis to return the stored entry
+    redis.execute_command.return_value = redis.setex.call_args.args[2]
+    
     # Test get_cache
     result = await get_cache(redis, key, list[MockSchema])
     assert len(result) == 2
     assert result[0].name == "test1"
     assert result[1].name == "test2"
 
-@pytest.mark.asyncio
-async def test_delete_cache_by_prefix():
-    redis = AsyncMock()
-    prefix = "planner:calendar"
-    redis.keys.return_value = [b"planner:calendar:1", b"planner:calendar:2"]
-    
-    await delete_cache_by_prefix(redis, prefix)
-    
-    redis.keys.assert_called_with(f"{prefix}*")
-    redis.delete.assert_called_once_with(b"planner:calendar:1", b"planner:calendar:2")
+def test_generation_key():
+    assert generation_key("planner:calendar:1", "7") == "planner:calendar:1:g7"
+    assert generation_key("planner:calendar:1", "7") != generation_key("planner:calendar:1", "8")
 
 @pytest.mark.asyncio
 async def test_get_cache_miss():
     redis = AsyncMock()
-    redis.get.return_value = None
+    redis.execute_command.return_value = None
     
     result = await get_cache(redis, "missing", MockSchema)
     assert result is None
+
+@pytest.mark.asyncio
+async def test_set_get_cache_raw():
+    redis = AsyncMock()
+    key = "test_raw_key"
+    data = b'[{"id": 1, "name": "test"}]'
+    redis.execute_command.return_value = pack_entry(data)
+
+    await set_cache(redis, key, data, raw=True)
+    redis.setex.assert_called_once_with(key, 3600, pack_entry(data))
+
+    # Байты возвращаются как есть, без декодирования и разбора
+    result = await get_cache(redis, key, list[MockSchema], raw=True)
+    assert result == data
+    redis.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_set_get_cache_msgpack(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SERIALIZER", "msgpack")
+    redis = AsyncMock()
+    key = "test_msgpack_key"
+    values = [MockSchema(id=1, name="test1"), MockSchema(id=2, name="test2")]
+
+    await set_cache(redis, key, values, list[MockSchema])
+    stored = redis.setex.call_args.args[2]
+    assert msgpack.unpackb(unpack_entry(stored)) == [{"id": 1, "name": "test1"}, {"id": 2, "name": "test2"}]
+
+    # Двоичное значение читается без декодирования в str
+    redis.execute_command.return_value = stored
+    result = await get_cache(redis, key, list[MockSchema])
+    assert result == values
+    redis.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_cache_other_format_is_miss(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SERIALIZER", "msgpack")
+    redis = AsyncMock()
+    redis.execute_command.return_value = pack_entry(b'[{"id": 1, "name": "test"}]')
+
+    assert await get_cache(redis, "json_written_key", list[MockSchema]) is None
+
+@pytest.mark.asyncio
+async def test_get_cache_legacy_entry_is_miss():
+    # Запись без байта формата (сохранённая до его появления) считается промахом
+    redis = AsyncMock()
+    redis.execute_command.return_value = b'{"id": 1, "name": "test"}'
+
+    assert await get_cache(redis, "legacy_key", MockSchema) is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", ["zlib", "zstd"])
+async def test_set_get_cache_compressed(monkeypatch, compression):
+    if compression == "zstd":
+        monkeypatch.setattr(cache, "zstandard", pytest.importorskip("zstandard"))
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION", compression)
+    monkeypatch.setattr(settings, "CACHE_COMPRESSION_MIN_BYTES", 100)
+    redis = AsyncMock()
+    values = [MockSchema(id=i, name="test") for i in range(100)]
+
+    await set_cache(redis, "test_key", values, list[MockSchema])
+    stored = redis.setex.call_args.args[2]
+    assert len(stored) < len(codec_for(list[MockSchema]).dumps(values))
+
+    redis.execute_command.return_value = stored
+    assert await get_cache(redis, "test_key", list[MockSchema]) == values
+
+    # Значения меньше порога не сжимаются
+    await set_cache(redis, "small_key", values[0], MockSchema)
+    assert redis.setex.call_args.args[2] == pack_entry(values[0].model_dump_json().encode())
+
+def test_codec_for_is_compiled_once():
+    assert codec_for(list[MockSchema]) is codec_for(list[MockSchema])
+
+def test_cache_key_prefix():
+    assert cache_key_prefix("planner:calendar:1:2026-10-18:g5:application/json") == "planner:calendar"
+    assert cache_key_prefix("planner:cached:list_tasks:1:g3") == "planner:cached:list_tasks"
+
+@pytest.mark.asyncio
+async def test_cache_metrics(monkeypatch):
+    metrics = CacheMetrics()
+    monkeypatch.setattr(cache, "cache_metrics", metrics)
+    redis = AsyncMock()
+
+    await set_cache(redis, "planner:test:1", MockSchema(id=1, name="test"), MockSchema)
+    redis.execute_command.return_value = redis.setex.call_args.args[2]
+    await get_cache(redis, "planner:test:1", MockSchema)
+
+    stats = metrics.snapshot()["planner:test"]
+    payload_size = len(MockSchema(id=1, name="test").model_dump_json())
+    assert (stats.writes, stats.reads) == (1, 1)
+    assert stats.payload_bytes == 2 * payload_size
+    assert stats.stored_bytes == 2 * (payload_size + 1)
+
+@pytest.fixture
+def l1_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_ENABLED", True)
+    local_cache.clear()
+    yield
+    local_cache.clear()
+
+def test_local_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_MAX_BYTES", 10)
+    cache = LocalCache()
+    cache.set("a", "a", 4)
+    cache.set("b", "b", 4)
+    cache.get("a")
+    cache.set("c", "c", 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
+    assert cache.total_bytes == 8
+
+    # Значение больше всего лимита не кэшируется
+    cache.set("d", "d", 11)
+    assert cache.get("d") is None
+
+def test_local_cache_ttl(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_TTL_SECONDS", 0)
+    cache = LocalCache()
+    cache.set("a", "a", 1)
+    assert cache.get("a") is None
+    assert cache.total_bytes == 0
+
+@pytest.mark.asyncio
+async def test_get_cache_served_from_l1(l1_enabled):
+    redis = AsyncMock()
+    redis.execute_command.return_value = pack_entry(MockSchema(id=1, name="test").model_dump_json().encode())
+
+    first = await get_cache(redis, "test_key", MockSchema)
+    second = await get_cache(redis, "test_key", MockSchema)
+    assert first == second == MockSchema(id=1, name="test")
+    redis.execute_command.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_invalidate_cache_publishes(l1_enabled):
+    redis = AsyncMock()
+    await set_cache(redis, "test_key", MockSchema(id=1, name="test"), MockSchema)
+    assert local_cache.get("test_key") is not None
+
+    await invalidate_cache(redis, "test_key")
+    assert local_cache.get("test_key") is None
+    redis.publish.assert_awaited_once_with(settings.CACHE_INVALIDATION_CHANNEL, "test_key")
+
+def make_lock_redis(acquired: bool, cached_values: list) -> AsyncMock:
+    redis = AsyncMock()
+    redis.execute_command.side_effect = cached_values
+    redis.lock = MagicMock(return_value=AsyncMock())
+    redis.lock.return_value.acquire.return_value = acquired
+    return redis
+
+@pytest.mark.asyncio
+async def test_get_or_compute_coalesces_misses(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_STALE_TTL_SECONDS", 60)
+    redis = make_lock_redis(acquired=True, cached_values=[None] * 5)
+    compute = AsyncMock(return_value=b"[]")
+
+    results = await asyncio.gather(*(get_or_compute(redis, "key", compute, raw=True, stale_key="stale")
+                                     for _ in range(5)))
+
+    assert results == [(b"[]", False)] * 5
+    compute.assert_awaited_once()
+    redis.lock.return_value.release.assert_awaited_once()
+    assert [call.args[0] for call in redis.setex.await_args_list] == ["key", "stale"]
+
+@pytest.mark.asyncio
+async def test_get_or_compute_owner_cancelled():
+    redis = make_lock_redis(acquired=True, cached_values=[None] * 3)
+    owner_compute = AsyncMock(side_effect=asyncio.Event().wait)
+    waiter_compute = AsyncMock(return_value=b"[]")
+
+    owner = asyncio.create_task(get_or_compute(redis, "key", owner_compute, raw=True))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(get_or_compute(redis, "key", waiter_compute, raw=True))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    # Пересчёт с сессией отменённого запроса отменяется, ожидающий запрос считает заново сам
+    assert await waiter == (b"[]", False)
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    owner_compute.assert_awaited_once()
+    waiter_compute.assert_awaited_once()
+    assert "key" not in cache.inflight_computations
+
+@pytest.mark.asyncio
+async def test_get_or_compute_returns_stale_while_locked(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_STALE_TTL_SECONDS", 60)
+    redis = make_lock_redis(acquired=False, cached_values=[None, pack_entry(b"[1]")])
+    compute = AsyncMock()
+
+    assert await get_or_compute(redis, "key", compute, raw=True, stale_key="stale") == (b"[1]", True)
+    compute.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_or_compute_waits_for_lock_owner(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_LOCK_POLL_SECONDS", 0)
+    redis = make_lock_redis(acquired=False, cached_values=[None, None, pack_entry(b"[2]")])
+    compute = AsyncMock()
+
+    # Без CACHE_STALE_TTL_SECONDS устаревшее значение не ищется, запрос ждёт владельца блокировки
+    assert await get_or_compute(redis, "key", compute, raw=True, stale_key="stale") == (b"[2]", False)
+    compute.assert_not_called()
+    redis.setex.assert_not_called()
+
+def make_request(headers: list[tuple[bytes, bytes]] | None = None) -> Request:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers or []})
+    request.state.user_id = 1
+    return request
+
+@pytest.mark.asyncio
+async def test_cached_endpoint():
+    calls = []
+
+    @cached(CacheTag.tasks)
+    async def list_items(request: Request, redis, item_id: int) -> list[MockSchema]:
+        calls.append(item_id)
+        return [MockSchema(id=item_id, name="test")]
+
+    redis = AsyncMock()
+    redis.mget.return_value = ["3"]
+    redis.execute_command.return_value = None
+    miss = await list_items(request=make_request(), redis=redis, item_id=1)
+    assert miss.body == b'[{"id":1,"name":"test"}]'
+
+    key, _, entry = redis.setex.await_args.args
+    assert key.startswith("planner:cached:list_items:1:item_id=1:") and key.endswith(":g3")
+    redis.execute_command.return_value = entry
+    hit = await list_items(request=make_request(), redis=redis, item_id=1)
+    assert hit.body == miss.body
+    assert hit.media_type == "application/json"
+    assert calls == [1]
+
+@pytest.mark.asyncio
+async def test_cached_endpoint_not_modified():
+    @cached(CacheTag.tasks)
+    async def list_items(request: Request, redis):
+        return Response(content=b"[]", media_type="application/json", headers={"ETag": '"1-abc"'})
+
+    redis = AsyncMock()
+    redis.mget.return_value = ["3"]
+    redis.execute_command.return_value = None
+    await list_items(request=make_request(), redis=redis)
+
+    (key, _, entry), (etag_key, _, etag) = (call.args for call in redis.setex.await_args_list)
+    assert etag_key == f"{key}:etag" and etag == '"1-abc"'
+
+    # На 304 читается только ETag, сама запись не запрашивается и не распаковывается
+    redis.execute_command.reset_mock()
+    redis.get.return_value = etag
+    not_modified = await list_items(request=make_request([(b"if-none-match", b'"1-abc"')]), redis=redis)
+    assert not_modified.status_code == 304
+    redis.get.assert_awaited_once_with(etag_key)
+    redis.execute_command.assert_not_called()
+
+    redis.execute_command.return_value = entry
+    changed = await list_items(request=make_request([(b"if-none-match", b'"0-abc"')]), redis=redis)
+    assert changed.status_code == 200 and changed.headers["etag"] == '"1-abc"'
+
+def test_mark_cache_tags():
+    session = MagicMock()
+    session.info = {}
+    mark_cache_tags(session, 1, CacheTag.tasks)
+    mark_cache_tags(session, 1, CacheTag.schedule, CacheTag.tasks)
+    mark_cache_tags(session, 2, CacheTag.manual_days)
+
+    assert pop_cache_tags(session) == {1: {CacheTag.tasks, CacheTag.schedule}, 2: {CacheTag.manual_days}}
+    assert pop_cache_tags(session) == {}
+
@@ -0,0 +1,73 @@
+import datetime as dt
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from starlette.requests import Request
+
+# Роутеры импортируют task_planner через src.api.planner
+pytest.importorskip("task_planner")
+
+from redis.exceptions import ConnectionError as RedisConnectionError  # noqa: E402
+
+from src.api import manual_day as manual_day_api, task as task_api  # noqa: E402
+from src.core.allocation import AllocationMethod  # noqa: E402
+from src.core.cache import CacheTag, mark_cache_tags  # noqa: E402
+from src.crud import allocation as allocation_crud  # noqa: E402
+from src.crud.day import CalendarDiff  # noqa: E402
+from src.schemas.allocation import AllocationResultSchema  # noqa: E402
+
+
+def make_write_redis() -> MagicMock:
+    redis = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[None, 2])
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_write_path_invalidates_without_keys_scan(monkeypatch):
+    request = Request({"type": "http", "method": "POST", "path": "/", "headers": []})
+    request.state.user_id = 1
+    session = AsyncMock()
+    session.info = {}
+
+    # CRUD-методы при записи отмечают теги кэша в сессии
+    def crud_write(tag):
+        return AsyncMock(side_effect=lambda write_session, *args: mark_cache_tags(write_session, 1, tag))
+
+    monkeypatch.setattr(task_api.task_crud, "schema_owner_create", crud_write(CacheTag.tasks))
+    monkeypatch.setattr(task_api.task_crud, "schema_update_by_id", crud_write(CacheTag.tasks))
+    monkeypatch.setattr(manual_day_api.manual_day_crud, "schema_owner_create", crud_write(CacheTag.manual_days))
+
+    redis = make_write_redis()
+    await task_api.create_task(request, MagicMock(), session, redis)
+    await task_api.update_task(request, MagicMock(), 1, session, redis)
+    await manual_day_api.create_manual_day(request, MagicMock(), session, redis)
+
+    # Инвалидация - только смена поколения, ключи не перебираются
+    for method in ("keys", "scan", "scan_iter", "delete"):
+        getattr(redis, method).assert_not_called()
+    # На каждую запись - по одной транзакции на теги и на версию расписания
+    assert redis.pipeline.call_count == 6
+    assert session.commit.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_allocation_survives_cache_write_through_failure(monkeypatch):
+    result = AllocationResultSchema(days=[], failed_task_ids=[])
+    mark_allocation_applied = AsyncMock()
+    monkeypatch.setattr(allocation_crud, "owner_allocation_input", AsyncMock(return_value=([], [], "hash")))
+    monkeypatch.setattr(allocation_crud, "get_memoized_allocation", AsyncMock(return_value=result))
+    monkeypatch.setattr(allocation_crud, "is_allocation_applied", AsyncMock(return_value=False))
+    monkeypatch.setattr(allocation_crud.failed_task_crud, "owner_sync", AsyncMock())
+    monkeypatch.setattr(allocation_crud.day_crud, "owner_sync_calendar", AsyncMock(return_value=CalendarDiff()))
+    monkeypatch.setattr(allocation_crud, "commit_and_invalidate", AsyncMock(return_value={1: "5"}))
+    monkeypatch.setattr(allocation_crud, "populate_calendar_caches", AsyncMock(side_effect=RedisConnectionError))
+    monkeypatch.setattr(allocation_crud, "mark_allocation_applied", mark_allocation_applied)
+
+    # Ошибка Redis после коммита не превращает успешную аллокацию в ошибку
+    assert await allocation_crud.owner_allocate(AsyncMock(), MagicMock(), 1, AllocationMethod.points_allocation,
+                                                dt.date(2026, 1, 1)) is result
+    mark_allocation_applied.assert_awaited_once()
@@ -0,0 +1,130 @@
+import datetime as dt
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import msgpack
+
+from src.core.calendar_cache import (CALENDAR_CACHE_PREFIX, CALENDAR_WITH_TASKS_CACHE_PREFIX, CalendarIndex,
+                                     calendar_dates_key, calendar_days_key, calendar_index_key, join_day_bodies,
+                                     planned_calendar_days, populate_calendar_caches, read_calendar_days,
+                                     read_calendar_window_dates, task_executions_days_adapter, tasks_days_adapter)
+from src.core.cache import codec_for, generation_key, unpack_entry
+from src.core.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.task import TaskSchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+DAY_1 = dt.date(2026, 1, 1)
+DAY_2 = dt.date(2026, 1, 2)
+TASK = TaskSchema(id=7, name="task", deadline=None, interest=5, importance=5, work_hours=6)
+PLANNED_DAYS = [
+    CreateTaskExecutionsDaySchema(date=DAY_2, work_hours=4, task_executions=[
+        CreateTaskExecutionSchema(task_id=7, doing_hours=2)]),
+    CreateTaskExecutionsDaySchema(date=DAY_1, work_hours=4, task_executions=[
+        CreateTaskExecutionSchema(task_id=7, doing_hours=4)]),
+]
+DAY_IDS = {DAY_1: 11, DAY_2: 12}
+
+
+def stored_day(day_id, date, doing_hours):
+    # Так день выглядит после загрузки из БД через selectinload
+    return SimpleNamespace(id=day_id, date=date, work_hours=4, task_executions=[
+        SimpleNamespace(task_id=7, doing_hours=doing_hours, task=TASK)])
+
+
+def test_planned_calendar_days():
+    days = planned_calendar_days(PLANNED_DAYS, DAY_IDS, DAY_2)
+    assert [(day.id, day.date) for day in days] == [(12, DAY_2)]
+    assert [day.id for day in planned_calendar_days(PLANNED_DAYS, DAY_IDS, DAY_1)] == [11, 12]
+
+
+def make_pipeline_redis(*results) -> tuple[AsyncMock, MagicMock]:
+    redis = AsyncMock()
+    pipe = MagicMock(execute=AsyncMock(side_effect=results or None))
+    redis.pipeline = MagicMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return redis, pipe
+
+
+@pytest.mark.asyncio
+async def test_populate_calendar_caches_matches_db_response():
+    redis, pipe = make_pipeline_redis()
+
+    await populate_calendar_caches(redis, 1, "5", DAY_1, PLANNED_DAYS, DAY_IDS, [TASK])
+
+    stored_days = [stored_day(11, DAY_1, 4), stored_day(12, DAY_2, 2)]
+    hashes = {call.args[0]: call.kwargs["mapping"] for call in pipe.hset.call_args_list}
+    sorted_sets = {call.args[0]: call.args[1] for call in pipe.zadd.call_args_list}
+    indexes = {call.args[0]: codec_for(CalendarIndex).loads(unpack_entry(call.args[2]))
+               for call in redis.setex.await_args_list}
+    # Всё расписание записывается одной копией, тела окна совпадают с ответом, собранным из БД
+    for prefix, adapter in ((CALENDAR_CACHE_PREFIX, task_executions_days_adapter),
+                            (CALENDAR_WITH_TASKS_CACHE_PREFIX, tasks_days_adapter)):
+        bodies = hashes[calendar_days_key(prefix, 1, JSON_MEDIA_TYPE, "5")]
+        assert list(bodies) == [DAY_1.isoformat(), DAY_2.isoformat()]
+        assert join_day_bodies(list(bodies.values()), JSON_MEDIA_TYPE) == adapter.dump_json(
+            adapter.validate_python(stored_days, from_attributes=True))
+        assert sorted_sets[calendar_dates_key(prefix, 1, JSON_MEDIA_TYPE, "5")] == {
+            "": 0, DAY_1.isoformat(): DAY_1.toordinal(), DAY_2.isoformat(): DAY_2.toordinal()}
+        assert indexes[generation_key(calendar_index_key(prefix, 1, JSON_MEDIA_TYPE), "5")] == CalendarIndex(
+            version="5", start_date=DAY_1)
+
+
+@pytest.mark.asyncio
+async def test_populate_calendar_caches_from_start_date():
+    redis, pipe = make_pipeline_redis()
+
+    await populate_calendar_caches(redis, 1, "5", DAY_2, PLANNED_DAYS, DAY_IDS, [TASK])
+
+    # Дни раньше начала кэша не сохраняются
+    for call in pipe.hset.call_args_list:
+        assert list(call.kwargs["mapping"]) == [DAY_2.isoformat()]
+
+
+@pytest.mark.asyncio
+async def test_read_calendar_window_dates():
+    index = CalendarIndex(version="5", start_date=DAY_1)
+    key = calendar_dates_key(CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, "5")
+    redis, pipe = make_pipeline_redis([1, [DAY_2.isoformat()]], [1, []], [0, []])
+
+    assert await read_calendar_window_dates(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, index, DAY_1,
+                                            dt.date(2026, 1, 5), limit=2, after_date=DAY_1) == [DAY_2]
+    # Окно выбирается по порядковым номерам дат, после курсора и не больше limit
+    pipe.zrange.assert_called_with(key, DAY_2.toordinal(), dt.date(2026, 1, 5).toordinal(), byscore=True,
+                                   offset=0, num=2)
+
+    assert await read_calendar_window_dates(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, index, DAY_2) == []
+    pipe.zrange.assert_called_with(key, DAY_2.toordinal(), "+inf", byscore=True, offset=None, num=None)
+
+    # Дат поколения в Redis уже нет
+    assert await read_calendar_window_dates(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, index, DAY_2) is None
+
+    # Окно раньше начала кэша в Redis не ищется
+    assert await read_calendar_window_dates(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, index,
+                                            dt.date(2025, 12, 31)) is None
+    assert pipe.execute.await_count == 3
+
+
+def test_join_day_bodies_msgpack():
+    bodies = [msgpack.packb({"id": 11}), msgpack.packb({"id": 12})]
+
+    assert msgpack.unpackb(join_day_bodies(bodies, MSGPACK_MEDIA_TYPE)) == [{"id": 11}, {"id": 12}]
+    assert msgpack.unpackb(join_day_bodies([], MSGPACK_MEDIA_TYPE)) == []
+
+
+@pytest.mark.asyncio
+async def test_read_calendar_days():
+    redis = AsyncMock()
+    redis.execute_command.return_value = [b'{"id":11}', b'{"id":12}']
+
+    assert await read_calendar_days(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, "5",
+                                    [DAY_1, DAY_2]) == b'[{"id":11},{"id":12}]'
+    assert redis.execute_command.await_args.args == (
+        "HMGET", calendar_days_key(CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, "5"), "2026-01-01", "2026-01-02")
+
+    # Дня уже нет в хеше - окно нужно читать из БД
+    redis.execute_command.return_value = [b'{"id":11}', None]
+    assert await read_calendar_days(redis, CALENDAR_CACHE_PREFIX, 1, JSON_MEDIA_TYPE, "5", [DAY_1, DAY_2]) is None
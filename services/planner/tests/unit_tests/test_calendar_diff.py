@@ -0,0 +1,70 @@
+import datetime as dt
+from types import SimpleNamespace
+
+from src.crud.day import diff_calendar
+from src.schemas.day import CreateTaskExecutionsDaySchema
+from src.schemas.task_execution import CreateTaskExecutionSchema
+
+
+def planned_day(date, work_hours, executions):
+    return CreateTaskExecutionsDaySchema(
+        date=date,
+        work_hours=work_hours,
+        task_executions=[CreateTaskExecutionSchema(task_id=task_id, doing_hours=hours) for task_id, hours in executions]
+    )
+
+
+def stored_day(day_id, date, work_hours):
+    return SimpleNamespace(id=day_id, date=date, work_hours=work_hours)
+
+
+def stored_execution(execution_id, day_id, task_id, doing_hours):
+    return SimpleNamespace(id=execution_id, day_id=day_id, task_id=task_id, doing_hours=doing_hours)
+
+
+DAY_1 = dt.date(2026, 1, 1)
+DAY_2 = dt.date(2026, 1, 2)
+DAY_3 = dt.date(2026, 1, 3)
+
+
+def test_diff_calendar_unchanged():
+    stored_days = [stored_day(1, DAY_1, 4), stored_day(2, DAY_2, 4)]
+    stored_executions = [stored_execution(10, 1, 100, 2), stored_execution(11, 1, 101, 2),
+                         stored_execution(12, 2, 100, 4)]
+    planned = [planned_day(DAY_1, 4, [(100, 2), (101, 2)]), planned_day(DAY_2, 4, [(100, 4)])]
+
+    diff = diff_calendar(stored_days, stored_executions, planned)
+
+    assert not diff
+
+
+def test_diff_calendar_only_changed_rows():
+    stored_days = [stored_day(1, DAY_1, 4), stored_day(2, DAY_2, 4)]
+    stored_executions = [stored_execution(10, 1, 100, 2), stored_execution(11, 1, 101, 2),
+                         stored_execution(12, 2, 100, 4)]
+    planned = [
+        planned_day(DAY_1, 6, [(100, 3), (102, 3)]),
+        planned_day(DAY_3, 4, [(101, 2)]),
+    ]
+
+    diff = diff_calendar(stored_days, stored_executions, planned)
+
+    assert [day.date for day in diff.new_days] == [DAY_3]
+    assert diff.updated_days == [{"id": 1, "work_hours": 6}]
+    assert diff.deleted_day_ids == [2]
+    assert diff.new_executions == [{"day_id": 1, "task_id": 102, "doing_hours": 3}]
+    assert diff.updated_executions == [{"id": 10, "doing_hours": 3}]
+    # Выполнения удалённого дня 2 не перечисляются - их удаляет каскад
+    assert diff.deleted_execution_ids == [11]
+    # id нового дня 3 добавляет owner_sync_calendar после вставки
+    assert diff.day_ids == {DAY_1: 1}
+
+
+def test_diff_calendar_empty_store():
+    planned = [planned_day(DAY_1, 4, [(100, 2)])]
+
+    diff = diff_calendar([], [], planned)
+
+    assert diff.new_days == planned
+    assert not diff.updated_days and not diff.deleted_day_ids
+    assert not diff.new_executions and not diff.updated_executions and not diff.deleted_execution_ids
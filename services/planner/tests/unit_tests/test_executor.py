@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from src.core.config import settings
+from src.core.executor import AllocationExecutor, AllocationQueueFullError, AllocationTimeoutError
+
+
+@pytest.fixture
+def thread_executor(monkeypatch):
+    monkeypatch.setattr(settings, "ALLOCATION_EXECUTOR", "thread")
+    monkeypatch.setattr(settings, "ALLOCATION_POOL_SIZE", 1)
+    executor = AllocationExecutor()
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+def add(a, b):
+    return a + b
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result(thread_executor):
+    assert await thread_executor.run(add, 2, 3) == 5
+    await asyncio.sleep(0)
+    assert thread_executor.pending_jobs == 0
+
+
+@pytest.mark.asyncio
+async def test_run_does_not_block_event_loop(thread_executor):
+    event = threading.Event()
+    job = asyncio.create_task(thread_executor.run(event.wait, 1))
+
+    # Пока задача ждёт в пуле, event loop продолжает обслуживать другие корутины
+    await asyncio.sleep(0.01)
+    assert not job.done()
+    event.set()
+    assert await job is True
+
+
+@pytest.mark.asyncio
+async def test_run_queue_full(thread_executor, monkeypatch):
+    monkeypatch.setattr(settings, "ALLOCATION_MAX_QUEUE_DEPTH", 1)
+    event = threading.Event()
+    job = asyncio.create_task(thread_executor.run(event.wait, 1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AllocationQueueFullError):
+        await thread_executor.run(add, 1, 1)
+
+    event.set()
+    await job
+
+
+@pytest.mark.asyncio
+async def test_run_timeout(thread_executor, monkeypatch):
+    monkeypatch.setattr(settings, "ALLOCATION_JOB_TIMEOUT_SECONDS", 0.01)
+
+    with pytest.raises(AllocationTimeoutError):
+        await thread_executor.run(time.sleep, 0.2)
+    # Задача ещё выполняется в пуле и продолжает занимать очередь
+    assert thread_executor.pending_jobs == 1
+    await asyncio.sleep(0.3)
+    assert thread_executor.pending_jobs == 0
+
+
+@pytest.mark.asyncio
+async def test_run_timeout_excludes_queue_wait(thread_executor, monkeypatch):
+    monkeypatch.setattr(settings, "ALLOCATION_JOB_TIMEOUT_SECONDS", 0.3)
+
+    # Вместе с ожиданием свободного процесса вторая задача дольше таймаута, но само выполнение в него укладывается
+    results = await asyncio.gather(thread_executor.run(time.sleep, 0.2), thread_executor.run(time.sleep, 0.2))
+    assert results == [None, None]
@@ -0,0 +1,106 @@
+import datetime as dt
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.core.jobs import (ALLOCATION_JOBS_GROUP, ALLOCATION_JOBS_STREAM, allocation_job_key, enqueue_allocation_job,
+                           get_allocation_job, read_allocation_job, refresh_allocation_job)
+from src.schemas.allocation import AllocationJobStatus
+
+
+@pytest.fixture
+def redis():
+    redis = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    pipeline = MagicMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipe)
+    pipeline.__aexit__ = AsyncMock(return_value=None)
+    redis.pipeline = MagicMock(return_value=pipeline)
+    redis.pipe = pipe
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_enqueue_allocation_job(redis):
+    job = await enqueue_allocation_job(redis, 7, "interest", dt.date(2026, 1, 1))
+
+    assert job.status == AllocationJobStatus.queued
+    assert job.owner_id == 7
+    saved = redis.pipe.hset.call_args.kwargs["mapping"]
+    assert saved["status"] == "queued"
+    assert saved["owner_id"] == 7
+    assert "started_at" not in saved
+    redis.pipe.expire.assert_called_once()
+    redis.xadd.assert_called_once()
+    assert redis.xadd.call_args.args == (ALLOCATION_JOBS_STREAM, {"job_id": job.id})
+
+
+@pytest.mark.asyncio
+async def test_get_allocation_job(redis):
+    redis.hgetall.return_value = {
+        "id": "abc",
+        "owner_id": "7",
+        "status": "done",
+        "allocation_method": "interest",
+        "start_date": "2026-01-01",
+        "enqueued_at": "2026-01-01T10:00:00Z",
+        "started_at": "2026-01-01T10:00:02Z",
+        "finished_at": "2026-01-01T10:00:05Z",
+    }
+
+    job = await get_allocation_job(redis, "abc")
+
+    redis.hgetall.assert_called_once_with(allocation_job_key("abc"))
+    assert job.owner_id == 7
+    assert job.status == AllocationJobStatus.done
+    assert job.wait_time_sec == 2
+    assert job.execution_time_sec == 3
+
+
+@pytest.mark.asyncio
+async def test_get_allocation_job_missing(redis):
+    redis.hgetall.return_value = {}
+    assert await get_allocation_job(redis, "missing") is None
+
+
+@pytest.mark.asyncio
+async def test_read_allocation_job_new_message(redis):
+    redis.xautoclaim.return_value = ["0-0", [], []]
+    redis.xreadgroup.return_value = [[ALLOCATION_JOBS_STREAM, [("1-0", {"job_id": "abc"})]]]
+
+    assert await read_allocation_job(redis, "worker-1") == ("1-0", "abc")
+
+
+@pytest.mark.asyncio
+async def test_read_allocation_job_reclaims_stale_message(redis):
+    redis.xautoclaim.return_value = ["0-0", [("1-0", {"job_id": "abc"})], []]
+
+    assert await read_allocation_job(redis, "worker-1") == ("1-0", "abc")
+    redis.xreadgroup.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_read_allocation_job_empty(redis):
+    redis.xautoclaim.return_value = ["0-0", [], []]
+    redis.xreadgroup.return_value = []
+
+    assert await read_allocation_job(redis, "worker-1") is None
+
+
+@pytest.mark.asyncio
+async def test_read_allocation_job_skips_held_message(redis):
+    # XAUTOCLAIM вернул задачу, которую этот воркер ещё выполняет: она не запускается второй раз
+    redis.xautoclaim.return_value = ["0-0", [("1-0", {"job_id": "abc"})], []]
+    redis.xreadgroup.return_value = []
+
+    assert await read_allocation_job(redis, "worker-1", held_message_ids={"1-0"}) is None
+    redis.xack.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_allocation_job(redis):
+    await refresh_allocation_job(redis, "worker-1", "1-0")
+
+    redis.xclaim.assert_called_once_with(ALLOCATION_JOBS_STREAM, ALLOCATION_JOBS_GROUP, "worker-1", min_idle_time=0,
+                                         message_ids=["1-0"], justid=True)
@@ -0,0 +1,37 @@
+import datetime as dt
+from types import SimpleNamespace
+
+from src.crud.day import normalize_calendar
+from src.schemas.day import NormalizedCalendarSchema, TasksDaySchema
+from src.schemas.task import TaskSchema
+
+TASK = SimpleNamespace(id=7, name="long task", deadline=None, interest=5, importance=5, work_hours=8)
+
+
+def day(day_id, date, *executions):
+    return SimpleNamespace(id=day_id, date=date, work_hours=4,
+                           task_executions=[SimpleNamespace(task_id=task_id, doing_hours=hours, task=TASK)
+                                            for task_id, hours in executions])
+
+
+def test_normalize_calendar():
+    days = [day(1, dt.date(2026, 1, 1), (7, 4)), day(2, dt.date(2026, 1, 2), (7, 4)), day(3, dt.date(2026, 1, 3))]
+
+    calendar = normalize_calendar(days, [TASK])
+
+    assert calendar.tasks == {7: TaskSchema.model_validate(TASK)}
+    assert [(d.date, d.work_hours, d.executions) for d in calendar.days] == [
+        (dt.date(2026, 1, 1), 4, [(7, 4)]),
+        (dt.date(2026, 1, 2), 4, [(7, 4)]),
+        (dt.date(2026, 1, 3), 4, []),
+    ]
+
+
+def test_normalized_calendar_is_smaller_than_nested():
+    days = [day(number, dt.date(2026, 1, 1) + dt.timedelta(days=number), (7, 4)) for number in range(40)]
+
+    nested = b"".join(TasksDaySchema.model_validate(d).model_dump_json().encode() for d in days)
+    normalized = normalize_calendar(days, [TASK]).model_dump_json().encode()
+
+    assert len(normalized) < len(nested) / 2
+    assert NormalizedCalendarSchema.model_validate_json(normalized).tasks[7].name == "long task"
@@ -0,0 +1,46 @@
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+from src.core.pagination import (NEXT_CURSOR_HEADER, decode_date_cursor, encode_date_cursor, set_next_cursor_header,
+                                 set_next_cursor_header_from_date)
+
+
+def test_date_cursor_round_trip():
+    date = dt.date(2026, 10, 18)
+
+    cursor = encode_date_cursor(date)
+
+    assert "2026" not in cursor
+    assert decode_date_cursor(cursor) == date
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_date_cursor(dt.date(2026, 1, 1))[:-2] + "!!"])
+def test_invalid_date_cursor(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_date_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_next_cursor_only_for_full_page():
+    days = [SimpleNamespace(date=dt.date(2026, 1, 1)), SimpleNamespace(date=dt.date(2026, 1, 2))]
+
+    full_page, last_page, unlimited = Response(), Response(), Response()
+    set_next_cursor_header(full_page, days, limit=2)
+    set_next_cursor_header(last_page, days, limit=3)
+    set_next_cursor_header(unlimited, days, limit=None)
+
+    assert decode_date_cursor(full_page.headers[NEXT_CURSOR_HEADER]) == dt.date(2026, 1, 2)
+    assert NEXT_CURSOR_HEADER not in last_page.headers
+    assert NEXT_CURSOR_HEADER not in unlimited.headers
+
+
+def test_next_cursor_from_date():
+    full_page, last_page = Response(), Response()
+    set_next_cursor_header_from_date(full_page, dt.date(2026, 1, 2))
+    set_next_cursor_header_from_date(last_page, None)
+
+    assert decode_date_cursor(full_page.headers[NEXT_CURSOR_HEADER]) == dt.date(2026, 1, 2)
+    assert NEXT_CURSOR_HEADER not in last_page.headers
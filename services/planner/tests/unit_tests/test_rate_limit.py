@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import Request, HTTPException, status
+from src.core.config import settings
 from src.core.rate_limit import RateLimiter
 from src.core.redis import redis_service
 
@@ -69,3 +70,12 @@ async def test_rate_limit_anonymous_ip(mock_redis, request_anonymous):
     
     # Проверяем, что ключ сформирован по IP
     mock_redis.incr.assert_called_with("rate_limit:/test:ip:192.168.1.1")
+
+@pytest.mark.asyncio
+async def test_rate_limit_disabled(mock_redis, request_with_user, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    limiter = RateLimiter(times=5, seconds=60)
+
+    await limiter(request_with_user)
+
+    mock_redis.incr.assert_not_called()
@@ -0,0 +1,80 @@
+import datetime as dt
+import json
+
+import msgpack
+import pytest
+from pydantic import BaseModel, TypeAdapter
+from starlette.requests import Request
+
+from fastapi.responses import JSONResponse
+
+from src.core.responses import (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE, FastJSONResponse,
+                                default_response_class, encoded_response, msgpack_response, ndjson_lines,
+                                negotiate_media_type)
+
+SUPPORTED = (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+
+class Item(BaseModel):
+    id: int
+    date: dt.date | None = None
+
+
+def make_request(accept: str | None) -> Request:
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON_MEDIA_TYPE),
+    ("*/*", JSON_MEDIA_TYPE),
+    ("application/x-ndjson", NDJSON_MEDIA_TYPE),
+    ("application/json, application/x-ndjson", JSON_MEDIA_TYPE),
+    ("application/json;q=0.5, application/x-ndjson", NDJSON_MEDIA_TYPE),
+    ("application/x-ndjson;q=0", JSON_MEDIA_TYPE),
+    ("text/html", JSON_MEDIA_TYPE),
+    ("application/msgpack", JSON_MEDIA_TYPE),
+])
+def test_negotiate_media_type(accept, expected):
+    assert negotiate_media_type(make_request(accept), SUPPORTED) == expected
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines():
+    async def items():
+        for item_id in (1, 2):
+            yield Item(id=item_id)
+
+    lines = [line async for line in ndjson_lines(items(), TypeAdapter(Item))]
+
+    assert lines == [b'{"id":1,"date":null}\n', b'{"id":2,"date":null}\n']
+
+
+def test_msgpack_response():
+    items = [Item(id=1, date=dt.date(2026, 1, 1))]
+
+    response = msgpack_response(items, TypeAdapter(list[Item]), {"ETag": '"1"'})
+
+    assert response.media_type == MSGPACK_MEDIA_TYPE
+    assert response.headers["ETag"] == '"1"'
+    assert msgpack.unpackb(response.body) == [{"id": 1, "date": "2026-01-01"}]
+
+
+def test_fast_json_response():
+    response = FastJSONResponse({"days": [{"date": "2026-01-01"}], 1: None})
+
+    assert response.body == b'{"days":[{"date":"2026-01-01"}],"1":null}'
+    assert response.media_type == JSON_MEDIA_TYPE
+    assert default_response_class(True) is FastJSONResponse
+    assert default_response_class(False) is JSONResponse
+
+
+@pytest.mark.parametrize("media_type", [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE])
+def test_encoded_response(media_type):
+    items = [Item(id=1, date=dt.date(2026, 1, 1))]
+
+    response = encoded_response(items, TypeAdapter(list[Item]), media_type)
+
+    assert response.media_type == media_type
+    decoded = msgpack.unpackb(response.body) if media_type == MSGPACK_MEDIA_TYPE else json.loads(response.body)
+    assert decoded == [{"id": 1, "date": "2026-01-01"}]
@@ -0,0 +1,82 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from src.core.schedule_version import (bump_schedule_version, check_schedule_etag, get_schedule_version,
+                                       is_not_modified, schedule_etag, schedule_version_key)
+
+
+def make_request(if_none_match: str | None = None, user_id: int = 1) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+    request.state.user_id = user_id
+    return request
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_version_single_get():
+    redis = AsyncMock()
+    redis.get.return_value = "42"
+
+    assert await get_schedule_version(redis, 1) == "42"
+    redis.get.assert_awaited_once_with(schedule_version_key(1))
+    redis.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_version_initializes_missing_key():
+    redis = AsyncMock()
+    redis.get.side_effect = [None, "1700000000000000000"]
+
+    assert await get_schedule_version(redis, 1) == "1700000000000000000"
+    assert redis.set.await_args.kwargs == {"nx": True}
+
+
+@pytest.mark.asyncio
+async def test_bump_schedule_version():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[None, 8])
+    redis = MagicMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    assert await bump_schedule_version(redis, 1) == "8"
+
+    assert pipe.set.call_args.kwargs == {"nx": True}
+    pipe.incr.assert_called_once_with(schedule_version_key(1))
+    pipe.execute.assert_awaited_once()
+
+
+def test_schedule_etag_depends_on_representation():
+    assert schedule_etag("1", "calendar", "2026-01-01") == schedule_etag("1", "calendar", "2026-01-01")
+    assert schedule_etag("1", "calendar", "2026-01-01") != schedule_etag("1", "calendar", "2026-01-02")
+    assert schedule_etag("1", "calendar") != schedule_etag("2", "calendar")
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ('"1-abc"', True),
+    ('W/"1-abc"', True),
+    ('"0-abc", "1-abc"', True),
+    ("*", True),
+    ('"2-abc"', False),
+])
+def test_is_not_modified(if_none_match, expected):
+    assert is_not_modified(make_request(if_none_match), '"1-abc"') is expected
+
+
+@pytest.mark.asyncio
+async def test_check_schedule_etag():
+    redis = AsyncMock()
+    redis.get.return_value = "7"
+    etag = schedule_etag("7", 1, "tasks")
+
+    response = Response()
+    assert await check_schedule_etag(make_request(), response, redis, "tasks") is None
+    assert response.headers["ETag"] == etag
+
+    not_modified = await check_schedule_etag(make_request(etag), Response(), redis, "tasks")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
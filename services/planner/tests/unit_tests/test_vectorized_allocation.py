@@ -0,0 +1,72 @@
+import datetime as dt
+
+from src.core.vectorized_allocation import vectorized_allocation
+from src.schemas.manual_day import ManualDaySchema
+from src.schemas.task import TaskSchema
+
+START_DATE = dt.date(2026, 1, 1)
+
+
+def schedule(result):
+    return [(day.date, day.work_hours, [(execution.task_id, execution.doing_hours)
+                                        for execution in day.task_executions]) for day in result.days]
+
+
+def day(offset):
+    return START_DATE + dt.timedelta(days=offset)
+
+
+def test_tasks_fill_days_by_score():
+    tasks = [
+        TaskSchema(id=1, name="boring", interest=1, importance=1, work_hours=3),
+        TaskSchema(id=2, name="fun", interest=9, importance=9, work_hours=6),
+    ]
+
+    result = vectorized_allocation(tasks, [], START_DATE, 4, 2)
+
+    assert schedule(result) == [
+        (day(0), 4, [(2, 4)]),
+        (day(1), 4, [(2, 2), (1, 2)]),
+        (day(2), 4, [(1, 1)]),
+    ]
+    assert result.failed_task_ids == []
+
+
+def test_manual_days_change_capacity():
+    tasks = [TaskSchema(id=1, name="task", work_hours=6)]
+    manual_days = [ManualDaySchema(id=1, date=day(0), work_hours=1), ManualDaySchema(id=2, date=day(1), work_hours=0)]
+
+    result = vectorized_allocation(tasks, manual_days, START_DATE, 4, 2)
+
+    assert schedule(result) == [
+        (day(0), 1, [(1, 1)]),
+        (day(1), 0, []),
+        (day(2), 4, [(1, 4)]),
+        (day(3), 4, [(1, 1)]),
+    ]
+
+
+def test_default_task_work_hours():
+    result = vectorized_allocation([TaskSchema(id=1, name="task")], [], START_DATE, 4, 3)
+
+    assert schedule(result) == [(day(0), 4, [(1, 3)])]
+
+
+def test_late_tasks_fail_and_free_capacity():
+    tasks = [
+        TaskSchema(id=1, name="too big", interest=10, importance=10, work_hours=8, deadline=day(0)),
+        TaskSchema(id=2, name="overdue", work_hours=1, deadline=day(-1)),
+        TaskSchema(id=3, name="fits", interest=1, importance=1, work_hours=4, deadline=day(0)),
+    ]
+
+    result = vectorized_allocation(tasks, [], START_DATE, 4, 2)
+
+    assert schedule(result) == [(day(0), 4, [(3, 4)])]
+    assert sorted(result.failed_task_ids) == [1, 2]
+
+
+def test_no_tasks():
+    result = vectorized_allocation([], [], START_DATE, 4, 2)
+
+    assert result.days == []
+    assert result.failed_task_ids == []
@@ -0,0 +1,100 @@
+import asyncio
+import datetime as dt
+import logging
+import logging.config
+import os
+import socket
+
+from redis.asyncio import Redis
+
+from src.core.allocation import AllocationMethod
+from src.core.config import settings
+from src.core.database import session_factory
+from src.core.executor import allocation_executor
+from src.core.jobs import (ack_allocation_job, allocation_job_reclaim_idle_seconds, create_allocation_jobs_group,
+                           get_allocation_job, read_allocation_job, refresh_allocation_job, save_allocation_job)
+from src.core.log import log_config
+from src.core.redis import redis_service
+from src.crud.allocation import owner_allocate
+from src.schemas.allocation import AllocationJobStatus
+
+logger = logging.getLogger("planner.worker")
+
+
+async def process_allocation_job(redis: Redis, message_id: str, job_id: str):
+    job = await get_allocation_job(redis, job_id)
+    # Статус задачи истёк по TTL или она уже была выполнена до падения воркера
+    if job is None or job.status in (AllocationJobStatus.done, AllocationJobStatus.failed):
+        await ack_allocation_job(redis, message_id)
+        return
+
+    job.status = AllocationJobStatus.running
+    job.started_at = dt.datetime.now(dt.timezone.utc)
+    await save_allocation_job(redis, job)
+    try:
+        async with session_factory() as session:
+            await owner_allocate(session, redis, job.owner_id, AllocationMethod(job.allocation_method),
+                                 job.start_date, job.end_date)
+    except Exception as e:
+        logger.exception(f"Allocation job {job.id} failed")
+        job.status = AllocationJobStatus.failed
+        job.error = str(e)
+    else:
+        job.status = AllocationJobStatus.done
+    job.finished_at = dt.datetime.now(dt.timezone.utc)
+    await save_allocation_job(redis, job)
+    await ack_allocation_job(redis, message_id)
+
+
+async def keep_allocation_job_claimed(redis: Redis, consumer: str, message_id: str):
+    # Пока задача выполняется, её сообщение регулярно переподтверждается за этим воркером
+    while True:
+        await asyncio.sleep(allocation_job_reclaim_idle_seconds() / 4)
+        try:
+            await refresh_allocation_job(redis, consumer, message_id)
+        except Exception:
+            logger.exception(f"Failed to refresh allocation job message {message_id}")
+
+
+async def main():
+    logging.config.dictConfig(log_config)
+    await redis_service.connect()
+    allocation_executor.start()
+    redis = redis_service.client
+    await create_allocation_jobs_group(redis)
+
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    # Задач больше, чем процессов пула, всё равно не выполняется одновременно: лишние только ждали бы в очереди
+    slots = asyncio.Semaphore(min(settings.ALLOCATION_WORKER_CONCURRENCY, settings.ALLOCATION_POOL_SIZE))
+    running_jobs = set()
+    held_message_ids = set()
+    logger.info(f"Allocation worker {consumer} started")
+
+    async def run_job(message_id: str, job_id: str):
+        keep_claimed = asyncio.create_task(keep_allocation_job_claimed(redis, consumer, message_id))
+        try:
+            await process_allocation_job(redis, message_id, job_id)
+        finally:
+            keep_claimed.cancel()
+            held_message_ids.discard(message_id)
+            slots.release()
+
+    try:
+        while True:
+            # Новую задачу забираем из стрима, только когда есть свободный слот
+            await slots.acquire()
+            message = await read_allocation_job(redis, consumer, held_message_ids=held_message_ids)
+            if message is None:
+                slots.release()
+                continue
+            held_message_ids.add(message[0])
+            job = asyncio.create_task(run_job(*message))
+            running_jobs.add(job)
+            job.add_done_callback(running_jobs.discard)
+    finally:
+        allocation_executor.shutdown()
+        await redis_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())